@@ -185,3 +185,21 @@ CREATE TABLE IF NOT EXISTS youtube_analytics (
     recorded_at TEXT NOT NULL DEFAULT (datetime('now')),
     PRIMARY KEY (video_id, age_window)
 );
+
+-- 12. Voice Centroids (per-run speaker embedding centroids for cross-run voice-identity drift)
+-- No foreign key to runs: catalog re-audits and third-party masters have no runs row, and a runs backfill must not erase voice history.
+CREATE TABLE IF NOT EXISTS voice_centroids (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    channel TEXT,
+    speaker TEXT NOT NULL,
+    model_id TEXT NOT NULL,
+    sample_rate INTEGER NOT NULL,
+    dim INTEGER NOT NULL,
+    chunk_count INTEGER NOT NULL,
+    centroid BLOB NOT NULL, -- dim x float32, little-endian
+    created_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+    UNIQUE(run_id, speaker, model_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_voice_centroids_model ON voice_centroids(model_id);
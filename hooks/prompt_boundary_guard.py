@@ -2,15 +2,26 @@
 from __future__ import annotations
 
 import argparse
+import ctypes
+import ctypes.util
 import fnmatch
 import hashlib
 import json
+import mmap
 import os
+import re
+import select
+import signal
+import socket
+import sqlite3
+import struct
 import subprocess
 import sys
 import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
 
 def repo_root() -> Path:
@@ -47,12 +58,68 @@ def matches_any(path: str, patterns: list[str]) -> bool:
 	return any(fnmatch.fnmatch(path, pattern) for pattern in patterns)
 
 
+def policy_categories(policy: dict[str, Any]) -> dict[str, list[str]]:
+	return {
+		"readonly": policy["readonly_paths"],
+		"editable": policy["editable_paths"],
+		"deny_scope": [pattern for hook in policy.get("hooks", []) for pattern in hook.get("deny_scope", [])],
+	}
+
+
+def literal_head(pattern: str) -> str | None:
+	head = pattern.split("/", 1)[0]
+	return None if any(char in head for char in "*?[") else head
+
+
+class PolicyMatcher:
+	# fnmatch semantics, compiled once: patterns are bucketed by literal first path segment, and each bucket is
+	# one regex of optional lookaheads, so a single match() reports every pattern (hence category) that applies.
+	def __init__(self, policy: dict[str, Any]) -> None:
+		owners: dict[str, set[str]] = {}
+		for category, patterns in policy_categories(policy).items():
+			for pattern in patterns:
+				owners.setdefault(pattern, set()).add(category)
+		self.patterns = sorted(owners)
+		self.owners = [frozenset(owners[pattern]) for pattern in self.patterns]
+		wildcard = [i for i, pattern in enumerate(self.patterns) if literal_head(pattern) is None]
+		heads: dict[str, list[int]] = {}
+		for i, pattern in enumerate(self.patterns):
+			head = literal_head(pattern)
+			if head is not None:
+				heads.setdefault(head, []).append(i)
+		self.buckets = {head: self._compile(ids + wildcard) for head, ids in heads.items()}
+		self.wildcard_bucket = self._compile(wildcard)
+
+	def _compile(self, ids: list[int]) -> tuple[re.Pattern[str], list[int]] | None:
+		if not ids:
+			return None
+		ids = sorted(ids)
+		source = "".join(f"(?=({fnmatch.translate(self.patterns[i])}))?" for i in ids)
+		return re.compile(source), ids
+
+	def categories(self, path: str) -> frozenset[str]:
+		bucket = self.buckets.get(path.split("/", 1)[0], self.wildcard_bucket)
+		if bucket is None:
+			return frozenset()
+		regex, ids = bucket
+		groups = regex.match(path).groups()
+		found: set[str] = set()
+		for i, group in zip(ids, groups):
+			if group is not None:
+				found |= self.owners[i]
+		return frozenset(found)
+
+	def classify(self, path: str) -> str:
+		categories = self.categories(path)
+		if "readonly" in categories:
+			return "readonly"
+		if "editable" in categories:
+			return "editable"
+		return "other"
+
+
 def classify_path(path: str, policy: dict[str, Any]) -> str:
-	if matches_any(path, policy["readonly_paths"]):
-		return "readonly"
-	if matches_any(path, policy["editable_paths"]):
-		return "editable"
-	return "other"
+	return PolicyMatcher(policy).classify(path)
 
 
 def pattern_root(pattern: str) -> str:
@@ -79,23 +146,89 @@ def monitored_roots(policy: dict[str, Any]) -> list[str]:
 	return sorted(roots)
 
 
+HASH_CHUNK = 8 * 1024 * 1024
+
+
 def file_sha256(path: Path) -> str:
-	hasher = hashlib.sha256()
-	with path.open("rb") as fh:
-		for chunk in iter(lambda: fh.read(1024 * 1024), b""):
-			hasher.update(chunk)
-	return hasher.hexdigest()
+	# hashlib drops the GIL on large updates, so big readinto chunks parallelise across threads. Not mmap: a render
+	# truncating the file mid-hash would SIGBUS the hook instead of just producing a digest that post sees change.
+	with path.open("rb", buffering=0) as fh:
+		size = os.fstat(fh.fileno()).st_size
+		if size < HASH_CHUNK:
+			return hashlib.sha256(fh.read()).hexdigest()
+		hasher = hashlib.sha256()
+		buffer = bytearray(HASH_CHUNK)
+		view = memoryview(buffer)
+		while count := fh.readinto(buffer):
+			hasher.update(view[:count])
+		return hasher.hexdigest()
+
+
+def hash_workers() -> int:
+	return int(os.environ.get("YT3_BOUNDARY_HASH_WORKERS", min(16, os.cpu_count() or 1)))
+
+
+# Files modified this close to the walk may change again within the same mtime tick; never trust their cached hash.
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def state_dir() -> Path:
+	directory = Path(tempfile.gettempdir()) / "yt3_prompt_boundary"
+	directory.mkdir(parents=True, exist_ok=True)
+	return directory
+
+
+class HashIndex:
+	# ctime is part of the key, like git's index: an in-place rewrite can restore size and mtime (os.utime), never ctime.
+	def __init__(self, path: Path) -> None:
+		self.conn = sqlite3.connect(path)
+		columns = {row[1] for row in self.conn.execute("PRAGMA table_info(hash_index)")}
+		if columns and "ctime_ns" not in columns:
+			self.conn.execute("DROP TABLE hash_index")
+		self.conn.execute(
+			"CREATE TABLE IF NOT EXISTS hash_index ("
+			"path TEXT PRIMARY KEY, inode INTEGER NOT NULL, device INTEGER NOT NULL, "
+			"size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, ctime_ns INTEGER NOT NULL, sha256 TEXT NOT NULL)"
+		)
+		self.rows: dict[str, tuple[int, int, int, int, int, str]] = {
+			row[0]: tuple(row[1:]) for row in self.conn.execute("SELECT * FROM hash_index")
+		}
+		self.started_ns = time.time_ns()
+		self.seen: set[str] = set()
+		self.updates: list[tuple[str, int, int, int, int, int, str]] = []
+		self.reused = 0
+		self.hashed = 0
+
+	def cached(self, rel: str, stat: os.stat_result) -> str | None:
+		self.seen.add(rel)
+		row = self.rows.get(rel)
+		if row is not None and row[:5] == (stat.st_ino, stat.st_dev, stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns):
+			self.reused += 1
+			return row[5]
+		return None
+
+	def store(self, rel: str, stat: os.stat_result, digest: str) -> None:
+		self.hashed += 1
+		if max(stat.st_mtime_ns, stat.st_ctime_ns) < self.started_ns - RACY_WINDOW_NS:
+			self.updates.append((rel, stat.st_ino, stat.st_dev, stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns, digest))
+
+	def close(self) -> None:
+		stale = [(rel,) for rel in self.rows.keys() - self.seen]
+		with self.conn:
+			self.conn.executemany("DELETE FROM hash_index WHERE path = ?", stale)
+			self.conn.executemany("INSERT OR REPLACE INTO hash_index VALUES (?, ?, ?, ?, ?, ?, ?)", self.updates)
+		self.conn.close()
+
 
 
 def relative_repo_path(path: Path) -> str:
 	return path.relative_to(repo_root()).as_posix()
 
 
-def snapshot_entry(path: Path, policy: dict[str, Any]) -> dict[str, Any]:
-	stat = path.lstat()
+def snapshot_entry(path: Path, stat: os.stat_result, is_symlink: bool, policy: dict[str, Any]) -> dict[str, Any]:
 	entry: dict[str, Any] = {
 		"exists": True,
-		"kind": "symlink" if path.is_symlink() else "file",
+		"kind": "symlink" if is_symlink else "file",
 		"size": stat.st_size,
 		"mode": stat.st_mode,
 		"inode": stat.st_ino,
@@ -103,7 +236,7 @@ def snapshot_entry(path: Path, policy: dict[str, Any]) -> dict[str, Any]:
 		"mtime_ns": stat.st_mtime_ns,
 	}
 
-	if path.is_symlink():
+	if is_symlink:
 		target = os.readlink(path)
 		resolved = path.resolve(strict=False)
 		entry["symlink_target"] = target
@@ -116,58 +249,542 @@ def snapshot_entry(path: Path, policy: dict[str, Any]) -> dict[str, Any]:
 					f"🛑 boundary violation: symlink escapes repository boundary: {path.as_posix()} -> {resolved.as_posix()}"
 				)
 			entry["resolved_repo_relative"] = None
-	else:
-		entry["sha256"] = file_sha256(path)
 
 	return entry
 
 
-def collect_snapshot(policy: dict[str, Any]) -> dict[str, dict[str, Any]]:
-	snapshot: dict[str, dict[str, Any]] = {}
-	for root in monitored_roots(policy):
-		root_path = repo_root() / root
-		if not root_path.exists() and not root_path.is_symlink():
+def walk_tree(directory: str) -> Iterator[tuple[str, os.stat_result, bool]]:
+	# Depth-first over name-sorted scandir entries, no extra stat per dirent. This is NOT sorted(Path.rglob) order
+	# ("a-b" vs "a/x"); write_state re-sorts by path_key, so nothing may rely on the walk order.
+	# Renders create and delete files under the roots while the hook walks them, so anything that vanished between
+	# listing and stat is skipped, as the rglob walk this replaced did.
+	try:
+		with os.scandir(directory) as it:
+			entries = sorted(it, key=lambda entry: entry.name)
+	except (FileNotFoundError, NotADirectoryError):
+		return
+	for entry in entries:
+		if entry.is_dir(follow_symlinks=False):
+			yield from walk_tree(entry.path)
 			continue
-		if root_path.is_file() or root_path.is_symlink():
-			if root_path.exists() or root_path.is_symlink():
-				rel = relative_repo_path(root_path)
-				snapshot[rel] = snapshot_entry(root_path, policy)
+		try:
+			stat = entry.stat(follow_symlinks=False)
+		except (FileNotFoundError, NotADirectoryError):
 			continue
-		for candidate in sorted(root_path.rglob("*")):
-			if candidate.is_dir():
-				continue
-			rel = relative_repo_path(candidate)
-			snapshot[rel] = snapshot_entry(candidate, policy)
-	return snapshot
+		yield entry.path, stat, entry.is_symlink()
+
+
+def walk_path(path: Path) -> Iterator[tuple[str, os.stat_result, bool]]:
+	try:
+		stat = path.lstat()
+	except FileNotFoundError:
+		return
+	is_symlink = path.is_symlink()
+	if is_symlink or not path.is_dir():
+		yield path.as_posix(), stat, is_symlink
+		return
+	yield from walk_tree(path.as_posix())
+
+
+def walk_monitored(policy: dict[str, Any]) -> Iterator[tuple[str, os.stat_result, bool]]:
+	for root in monitored_roots(policy):
+		yield from walk_path(repo_root() / root)
+
+
+def repo_digest() -> str:
+	return hashlib.sha1(repo_root().as_posix().encode("utf-8")).hexdigest()[:12]
+
+
+def snapshot_items(
+	items: Iterator[tuple[str, os.stat_result, bool]],
+	policy: dict[str, Any],
+	index: HashIndex | None = None,
+	workers: int | None = None,
+) -> tuple[dict[str, dict[str, Any]], dict[str, Any]]:
+	snapshot: dict[str, dict[str, Any]] = {}
+	started = time.perf_counter()
+	to_hash: list[tuple[str, Path, os.stat_result]] = []
+	for raw, stat, is_symlink in items:
+		path = Path(raw)
+		rel = relative_repo_path(path)
+		entry = snapshot_entry(path, stat, is_symlink, policy)
+		snapshot[rel] = entry
+		if is_symlink:
+			continue
+		digest = index.cached(rel, stat) if index else None
+		if digest is None:
+			to_hash.append((rel, path, stat))
+		else:
+			entry["sha256"] = digest
+	walked = time.perf_counter()
+
+	with ThreadPoolExecutor(max_workers=workers or hash_workers()) as pool:
+		digests = pool.map(file_sha256, [path for _, path, _ in to_hash])
+		for (rel, _, stat), digest in zip(to_hash, digests):
+			snapshot[rel]["sha256"] = digest
+			if index:
+				index.store(rel, stat, digest)
+	hashed = time.perf_counter()
+
+	stats: dict[str, Any] = {
+		"files": len(snapshot),
+		"reused": index.reused if index else 0,
+		"hashed": len(to_hash),
+		"hashed_bytes": sum(stat.st_size for _, _, stat in to_hash),
+		"walk_sec": round(walked - started, 4),
+		"hash_sec": round(hashed - walked, 4),
+	}
+	return snapshot, stats
+
+
+def collect_snapshot(policy: dict[str, Any], use_index: bool = True, workers: int | None = None) -> tuple[dict[str, dict[str, Any]], dict[str, Any]]:
+	index = HashIndex(state_dir() / f"hash_index-{repo_digest()}.sqlite") if use_index else None
+	try:
+		return snapshot_items(walk_monitored(policy), policy, index, workers)
+	finally:
+		if index:
+			index.close()
 
 
-def git_lines(args: list[str], paths: list[str]) -> list[str]:
+def porcelain_v1(xy: str, path: str, orig_path: str | None = None) -> str:
+	xy = xy.replace(".", " ")
+	return f"{xy} {orig_path} -> {path}" if orig_path else f"{xy} {path}"
+
+
+def ignored_files(path: str) -> list[str]:
+	# status reports a directory matched by an ignore pattern once ("dir/"); ls-files listed every file under it.
+	if not path.endswith("/"):
+		return [path]
+	return sorted(relative_repo_path(Path(raw)) for raw, _, _ in walk_tree((repo_root() / path).as_posix()))
+
+
+def git_evidence(paths: list[str]) -> dict[str, list[str]]:
+	# One porcelain-v2 status read covers what used to take status, diff --cached, diff and ls-files --ignored:
+	# X/Y say whether the index or the worktree differ, and "!" records are the ignored files.
+	evidence: dict[str, list[str]] = {"status": [], "diff_cached": [], "diff_worktree": [], "ignored": []}
 	if not paths:
-		return []
+		return evidence
 	result = subprocess.run(
-		["git", *args, "--", *paths],
+		["git", "status", "--porcelain=v2", "-z", "--untracked-files=all", "--ignored=matching", "--", *paths],
 		cwd=repo_root(),
 		check=True,
-		text=True,
 		capture_output=True,
 	)
-	return [line for line in result.stdout.splitlines() if line]
-
-
-def git_evidence(paths: list[str]) -> dict[str, list[str]]:
-	return {
-		"status": git_lines(["status", "--porcelain=v1", "--untracked-files=all", "--ignored=matching"], paths),
-		"diff_cached": git_lines(["diff", "--name-only", "--cached"], paths),
-		"diff_worktree": git_lines(["diff", "--name-only"], paths),
-		"ignored": git_lines(["ls-files", "--others", "--ignored", "--exclude-standard"], paths),
-	}
+	fields = iter(os.fsdecode(result.stdout).split("\0"))
+	for record in fields:
+		if not record:
+			continue
+		kind = record[0]
+		if kind in "?!":
+			path = record[2:]
+			evidence["status"].append(f"{kind}{kind} {path}")
+			if kind == "!":
+				evidence["ignored"].extend(ignored_files(path))
+			continue
+		# 1: 8 fields before the path, 2: 9 (plus the original path as the next record), u: 10.
+		parts = record.split(" ", {"1": 8, "2": 9, "u": 10}[kind])
+		xy, path = parts[1], parts[-1]
+		orig_path = next(fields) if kind == "2" else None
+		evidence["status"].append(porcelain_v1(xy, path, orig_path))
+		if kind == "u" or xy[0] != ".":
+			evidence["diff_cached"].append(path)
+		if kind == "u" or xy[1] != ".":
+			evidence["diff_worktree"].append(path)
+	return evidence
 
 
 def state_path_for(target: str) -> Path:
-	state_dir = Path(tempfile.gettempdir()) / "yt3_prompt_boundary"
-	state_dir.mkdir(parents=True, exist_ok=True)
 	digest = hashlib.sha1(target.encode("utf-8")).hexdigest()[:12]
-	return state_dir / f"{digest}.json"
+	return state_dir() / f"{digest}.snap"
+
+
+# Pre/post handoff: header, fixed-width records sorted by path_key, then a heap of paths, symlink details and
+# the JSON metadata. The post phase mmaps the file and merges the records against its own walk.
+STATE_MAGIC = b"YT3SNAP1"
+STATE_HEADER = struct.Struct("<8sQQQ")
+STATE_RECORD = struct.Struct("<QIBIQQQq32sQI")
+SYMLINK_FIELDS = ("symlink_target", "resolved_path", "resolved_repo_relative")
+
+
+def path_key(rel: str) -> list[str]:
+	return rel.split("/")
+
+
+def write_state(state_file: Path, snapshot: dict[str, dict[str, Any]], meta: dict[str, Any]) -> None:
+	ordered = sorted(snapshot, key=path_key)
+	heap_base = STATE_HEADER.size + len(ordered) * STATE_RECORD.size
+	records = bytearray()
+	heap = bytearray()
+	for rel in ordered:
+		entry = snapshot[rel]
+		path_bytes = rel.encode("utf-8")
+		path_offset = heap_base + len(heap)
+		heap += path_bytes
+		is_symlink = entry["kind"] == "symlink"
+		extra = json.dumps({field: entry[field] for field in SYMLINK_FIELDS}).encode("utf-8") if is_symlink else b""
+		extra_offset = heap_base + len(heap)
+		heap += extra
+		records += STATE_RECORD.pack(
+			path_offset,
+			len(path_bytes),
+			int(is_symlink),
+			entry["mode"],
+			entry["size"],
+			entry["inode"],
+			entry["device"],
+			entry["mtime_ns"],
+			b"" if is_symlink else bytes.fromhex(entry["sha256"]),
+			extra_offset,
+			len(extra),
+		)
+	meta_bytes = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+	meta_offset = heap_base + len(heap)
+	partial = state_file.with_suffix(".partial")
+	with partial.open("wb") as fh:
+		fh.write(STATE_HEADER.pack(STATE_MAGIC, len(ordered), meta_offset, len(meta_bytes)))
+		fh.write(records)
+		fh.write(heap)
+		fh.write(meta_bytes)
+	os.replace(partial, state_file)
+
+
+class SnapshotState:
+	def __init__(self, state_file: Path) -> None:
+		with state_file.open("rb") as fh:
+			self.mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+		magic, self.count, meta_offset, meta_length = STATE_HEADER.unpack_from(self.mapped, 0)
+		if magic != STATE_MAGIC:
+			fail(f"prompt-boundary-guard: unreadable pre-hook state {state_file}")
+		self.meta = json.loads(self.mapped[meta_offset:meta_offset + meta_length].decode("utf-8"))
+
+	def record_at(self, i: int) -> tuple[str, tuple[Any, ...]]:
+		record = STATE_RECORD.unpack_from(self.mapped, STATE_HEADER.size + i * STATE_RECORD.size)
+		path_offset, path_length = record[0], record[1]
+		return self.mapped[path_offset:path_offset + path_length].decode("utf-8"), record
+
+	def __iter__(self) -> Iterator[tuple[str, tuple[Any, ...]]]:
+		for i in range(self.count):
+			yield self.record_at(i)
+
+	def subtree(self, rel: str) -> Iterator[tuple[str, tuple[Any, ...]]]:
+		# Records are path_key-sorted, so a path and everything beneath it form one contiguous run.
+		key = path_key(rel)
+		low, high = 0, self.count
+		while low < high:
+			middle = (low + high) // 2
+			if path_key(self.record_at(middle)[0]) < key:
+				low = middle + 1
+			else:
+				high = middle
+		for i in range(low, self.count):
+			path, record = self.record_at(i)
+			if path_key(path)[:len(key)] != key:
+				return
+			yield path, record
+
+	def entry(self, record: tuple[Any, ...]) -> dict[str, Any]:
+		_, _, is_symlink, mode, size, inode, device, mtime_ns, digest, extra_offset, extra_length = record
+		entry: dict[str, Any] = {
+			"exists": True,
+			"kind": "symlink" if is_symlink else "file",
+			"size": size,
+			"mode": mode,
+			"inode": inode,
+			"device": device,
+			"mtime_ns": mtime_ns,
+		}
+		if is_symlink:
+			entry.update(json.loads(self.mapped[extra_offset:extra_offset + extra_length].decode("utf-8")))
+		else:
+			entry["sha256"] = digest.hex()
+		return entry
+
+	def close(self) -> None:
+		self.mapped.close()
+
+
+def diff_snapshot(
+	baseline: SnapshotState, current_snapshot: dict[str, dict[str, Any]]
+) -> tuple[list[str], list[str], list[str], dict[str, dict[str, Any]]]:
+	# Streaming merge of two path_key-sorted sequences; only deleted baseline entries are materialised (for renames).
+	added: list[str] = []
+	deleted: dict[str, dict[str, Any]] = {}
+	modified: list[str] = []
+	current = iter(sorted(current_snapshot, key=path_key))
+	pending = next(current, None)
+	for rel, record in baseline:
+		while pending is not None and path_key(pending) < path_key(rel):
+			added.append(pending)
+			pending = next(current, None)
+		if pending == rel:
+			if current_snapshot[rel] != baseline.entry(record):
+				modified.append(rel)
+			pending = next(current, None)
+		else:
+			deleted[rel] = baseline.entry(record)
+	while pending is not None:
+		added.append(pending)
+		pending = next(current, None)
+	return sorted(added), sorted(deleted), sorted(modified), deleted
+
+
+def journal_snapshot(
+	baseline: SnapshotState, changed: list[str], policy: dict[str, Any]
+) -> tuple[dict[str, dict[str, Any]], dict[str, dict[str, Any]], dict[str, Any]]:
+	# The watcher's changed paths on both sides of the edit (a directory covers its subtree).
+	items: dict[str, tuple[str, os.stat_result, bool]] = {}
+	before: dict[str, dict[str, Any]] = {}
+	for rel in changed:
+		for item in walk_path(repo_root() / rel):
+			items[item[0]] = item
+		for path, record in baseline.subtree(rel):
+			before[path] = baseline.entry(record)
+	current_snapshot, stats = snapshot_items(iter(items.values()), policy)
+	return before, current_snapshot, stats
+
+
+def diff_journal(
+	before: dict[str, dict[str, Any]], current_snapshot: dict[str, dict[str, Any]]
+) -> tuple[list[str], list[str], list[str], dict[str, dict[str, Any]]]:
+	added = sorted(set(current_snapshot) - set(before))
+	deleted = {rel: entry for rel, entry in before.items() if rel not in current_snapshot}
+	modified = sorted(rel for rel in current_snapshot if rel in before and current_snapshot[rel] != before[rel])
+	return added, sorted(deleted), modified, deleted
+
+
+# Resident watcher (--watch): inotify via ctypes keeps a journal of paths touched under the monitored roots.
+# The pre phase records a journal marker; the post phase asks for paths changed since it instead of re-walking.
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+WATCH_MASK = (
+	IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+	| IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW | IN_EXCL_UNLINK
+)
+INOTIFY_EVENT = struct.Struct("iIII")
+JOURNAL_LIMIT = 200_000
+WATCH_TIMEOUT_SEC = 2.0
+
+
+def watch_socket_path() -> Path:
+	return state_dir() / f"watch-{repo_digest()}.sock"
+
+
+class ChangeJournal:
+	def __init__(self, policy: dict[str, Any]) -> None:
+		libc_name = ctypes.util.find_library("c")
+		self.libc = ctypes.CDLL(libc_name, use_errno=True)
+		self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+		if self.fd < 0:
+			raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+		self.roots = monitored_roots(policy)
+		self.epoch = f"{os.getpid()}-{time.time_ns()}"
+		self.seq = 0
+		# Markers at or before overflow_seq cannot be answered: events may have been dropped after them.
+		self.overflow_seq = 0
+		# Set once any watch could not be added: that subtree is unobserved for good, so no marker is ever answered.
+		self.blind: str | None = None
+		self.changed: dict[str, int] = {}
+		self.wd_paths: dict[int, str] = {}
+		self.sentinels: set[int] = set()
+		for root in self.roots:
+			self.watch_root(root)
+
+	def in_roots(self, rel: str) -> bool:
+		return any(rel == root or rel.startswith(root + "/") for root in self.roots)
+
+	def invalidate(self) -> None:
+		self.overflow_seq = self.seq
+		self.changed.clear()
+
+	def add_watch(self, rel: str) -> int:
+		wd = self.libc.inotify_add_watch(self.fd, os.fsencode(repo_root() / rel), WATCH_MASK)
+		if wd < 0:
+			# ENOSPC (max_user_watches) or a racing delete: either way the journal cannot vouch for this subtree,
+			# now or later, so every answer from here on sends the hook down the full snapshot path.
+			if self.blind is None:
+				self.blind = f"inotify_add_watch failed on {rel}: {os.strerror(ctypes.get_errno())}"
+				print(f"prompt-boundary-guard: {self.blind}; journal disabled until the watcher restarts", file=sys.stderr)
+			self.invalidate()
+			return wd
+		self.wd_paths[wd] = rel
+		return wd
+
+	def watch_tree(self, rel: str) -> None:
+		for directory, subdirs, _ in os.walk(repo_root() / rel):
+			self.add_watch(relative_repo_path(Path(directory)))
+			subdirs.sort()
+
+	def unwatch_tree(self, rel: str) -> None:
+		for wd, path in list(self.wd_paths.items()):
+			if path == rel or path.startswith(rel + "/"):
+				self.libc.inotify_rm_watch(self.fd, wd)
+				del self.wd_paths[wd]
+				self.sentinels.discard(wd)
+
+	def watch_root(self, root: str) -> None:
+		path = repo_root() / root
+		if path.is_dir() and not path.is_symlink():
+			self.watch_tree(root)
+			return
+		# A file root or a root that does not exist yet: watch the nearest existing directory above it.
+		parent = path.parent
+		while not parent.is_dir() and parent != repo_root():
+			parent = parent.parent
+		wd = self.add_watch(relative_repo_path(parent))
+		if wd >= 0 and not path.exists():
+			self.sentinels.add(wd)
+
+	def handle(self, wd: int, mask: int, name: str) -> None:
+		self.seq += 1
+		if mask & IN_Q_OVERFLOW:
+			self.invalidate()
+			return
+		base = self.wd_paths.get(wd)
+		if base is None:
+			return
+		if mask & IN_IGNORED:
+			del self.wd_paths[wd]
+			self.sentinels.discard(wd)
+			return
+		rel = (f"{base}/{name}" if base != "." else name) if name else base
+		if wd in self.sentinels and mask & (IN_CREATE | IN_MOVED_TO):
+			# Something appeared on the way to a missing root; re-arm the roots and make earlier markers stale.
+			self.libc.inotify_rm_watch(self.fd, wd)
+			del self.wd_paths[wd]
+			self.sentinels.discard(wd)
+			for root in self.roots:
+				if not any(path == root or path.startswith(root + "/") for path in self.wd_paths.values()):
+					self.watch_root(root)
+			self.invalidate()
+			return
+		if not self.in_roots(rel):
+			return
+		self.changed[rel] = self.seq
+		if mask & (IN_DELETE_SELF | IN_MOVE_SELF) and rel in self.roots:
+			# The root directory itself went away; its watches die with it, so watch whatever is there now.
+			self.unwatch_tree(rel)
+			self.watch_root(rel)
+			return
+		if mask & IN_ISDIR:
+			if mask & IN_MOVED_FROM:
+				self.unwatch_tree(rel)
+			if mask & (IN_CREATE | IN_MOVED_TO):
+				# Files written before the new watch lands are covered: post re-walks the whole directory.
+				self.watch_tree(rel)
+		if len(self.changed) > JOURNAL_LIMIT:
+			self.invalidate()
+
+	def drain(self) -> None:
+		while True:
+			try:
+				data = os.read(self.fd, 65536)
+			except BlockingIOError:
+				return
+			offset = 0
+			while offset < len(data):
+				wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+				start = offset + INOTIFY_EVENT.size
+				name = os.fsdecode(data[start:start + length].rstrip(b"\0"))
+				offset = start + length
+				self.handle(wd, mask, name)
+
+	def answer(self, request: dict[str, Any]) -> dict[str, Any]:
+		# Edits finished before the hook connected, so their events are already queued; drain before answering.
+		self.drain()
+		if self.blind is not None:
+			return {"ok": False, "reason": self.blind}
+		# The roots go out with every reply: a policy edited after the watcher started may cover paths it never watched.
+		if request.get("op") == "mark":
+			return {"ok": True, "epoch": self.epoch, "marker": self.seq, "roots": self.roots}
+		if request.get("op") == "changes":
+			marker = int(request.get("marker", -1))
+			if request.get("epoch") != self.epoch or marker < self.overflow_seq:
+				return {"ok": False, "reason": "journal does not cover marker"}
+			return {"ok": True, "roots": self.roots, "paths": sorted(rel for rel, seq in self.changed.items() if seq > marker)}
+		return {"ok": False, "reason": f"unknown op {request.get('op')!r}"}
+
+
+def run_watch(policy: dict[str, Any]) -> int:
+	if not sys.platform.startswith("linux"):
+		fail("prompt-boundary-guard: --watch needs Linux inotify")
+	journal = ChangeJournal(policy)
+	signal.signal(signal.SIGTERM, signal.default_int_handler)
+	socket_path = watch_socket_path()
+	socket_path.unlink(missing_ok=True)
+	server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	server.bind(str(socket_path))
+	os.chmod(socket_path, 0o600)
+	server.listen(8)
+	print(
+		f"prompt-boundary-guard: watching {', '.join(journal.roots)} ({len(journal.wd_paths)} directories) on {socket_path}",
+		file=sys.stderr,
+	)
+	try:
+		while True:
+			readable, _, _ = select.select([server, journal.fd], [], [])
+			if journal.fd in readable:
+				journal.drain()
+			if server not in readable:
+				continue
+			conn, _ = server.accept()
+			with conn:
+				conn.settimeout(WATCH_TIMEOUT_SEC)
+				try:
+					request = json.loads(conn.makefile("r", encoding="utf-8").readline() or "{}")
+					conn.sendall((json.dumps(journal.answer(request)) + "\n").encode("utf-8"))
+				except (OSError, json.JSONDecodeError) as exc:
+					print(f"prompt-boundary-guard: dropped watch request: {exc}", file=sys.stderr)
+	except KeyboardInterrupt:
+		return 0
+	finally:
+		server.close()
+		socket_path.unlink(missing_ok=True)
+		os.close(journal.fd)
+
+
+def watcher_request(request: dict[str, Any]) -> dict[str, Any] | None:
+	# No watcher, a dead socket or a slow answer all mean the same thing to the hook: take the full snapshot path.
+	socket_path = watch_socket_path()
+	if not socket_path.exists():
+		return None
+	try:
+		with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+			conn.settimeout(WATCH_TIMEOUT_SEC)
+			conn.connect(str(socket_path))
+			conn.sendall((json.dumps(request) + "\n").encode("utf-8"))
+			response = json.loads(conn.makefile("r", encoding="utf-8").readline())
+	except (OSError, json.JSONDecodeError):
+		return None
+	return response if response.get("ok") else None
+
+
+def timing_log_path() -> Path:
+	return Path(os.environ.get("YT3_BOUNDARY_TIMING_LOG", repo_root() / "logs" / "prompt_boundary_timings.jsonl"))
+
+
+def log_timings(record: dict[str, Any]) -> None:
+	log_path = timing_log_path()
+	try:
+		log_path.parent.mkdir(parents=True, exist_ok=True)
+		with log_path.open("a", encoding="utf-8") as fh:
+			fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+	except OSError as exc:
+		print(f"prompt-boundary-guard: could not write timing log {log_path}: {exc}", file=sys.stderr)
 
 
 def fail(message: str) -> None:
@@ -175,54 +792,71 @@ def fail(message: str) -> None:
 	raise SystemExit(2)
 
 
-def run_pre(target: str, policy: dict[str, Any]) -> int:
-	if classify_path(target, policy) == "readonly":
+def run_pre(target: str, policy: dict[str, Any], log: dict[str, Any]) -> int:
+	timings = log["timings_sec"]
+	target_class = classify_path(target, policy)
+	if target_class == "readonly":
 		fail(f"🛑 boundary violation: {target} is read-only.")
 
 	state_file = state_path_for(target)
-	with state_file.open("w", encoding="utf-8") as fh:
-		json.dump(
-			{
-				"target": target,
-				"baseline_snapshot": collect_snapshot(policy),
-				"git_evidence": git_evidence(monitored_roots(policy)),
-			},
-			fh,
-			ensure_ascii=False,
-			indent=2,
-		)
+	# Mark before walking: anything that changes during the walk is then in the journal as well.
+	watch_marker = watcher_request({"op": "mark"})
+	if watch_marker is not None and watch_marker.get("roots") != monitored_roots(policy):
+		watch_marker = None
+	baseline_snapshot, snapshot_stats = collect_snapshot(policy)
+	timings.update(walk=snapshot_stats["walk_sec"], hash=snapshot_stats["hash_sec"])
+	log["files"] = snapshot_stats["files"]
+	started = time.perf_counter()
+	evidence = git_evidence(monitored_roots(policy))
+	timings["git"] = round(time.perf_counter() - started, 4)
+	started = time.perf_counter()
+	write_state(
+		state_file,
+		baseline_snapshot,
+		{
+			"target": target,
+			"snapshot_stats": snapshot_stats,
+			"watch_marker": watch_marker,
+			"git_evidence": evidence,
+		},
+	)
+	timings["state_write"] = round(time.perf_counter() - started, 4)
 
-	if classify_path(target, policy) == "editable":
+	if target_class == "editable":
 		print(f"✅ boundary ok: {target} is within editable prompt scope.")
 
 	return 0
 
 
-def run_post(target: str, policy: dict[str, Any]) -> int:
+def run_post(target: str, policy: dict[str, Any], log: dict[str, Any]) -> int:
+	timings = log["timings_sec"]
 	state_file = state_path_for(target)
 	if not state_file.exists():
 		fail(f"prompt-boundary-guard: missing pre-hook state for {target}")
 
-	with state_file.open("r", encoding="utf-8") as fh:
-		state = json.load(fh)
-
-	baseline_snapshot = state.get("baseline_snapshot", {})
-	current_snapshot = collect_snapshot(policy)
-	baseline_paths = set(baseline_snapshot.keys())
-	current_paths = set(current_snapshot.keys())
-	added_paths = sorted(current_paths - baseline_paths)
-	deleted_paths = sorted(baseline_paths - current_paths)
-	modified_paths = sorted(
-		path
-		for path in sorted(current_paths & baseline_paths)
-		if current_snapshot[path] != baseline_snapshot[path]
-	)
-	hook_deny_scope = [
-		pattern
-		for hook in policy.get("hooks", [])
-		for pattern in hook.get("deny_scope", [])
-	]
-	target_is_editable = classify_path(target, policy) == "editable"
+	started = time.perf_counter()
+	baseline = SnapshotState(state_file)
+	watch_marker = baseline.meta.get("watch_marker")
+	journal = watcher_request({"op": "changes", "epoch": watch_marker["epoch"], "marker": watch_marker["marker"]}) if watch_marker else None
+	if journal is not None and journal.get("roots") != monitored_roots(policy):
+		# The watcher runs with an older policy's roots; only a full snapshot covers the current ones.
+		journal = None
+	timings["state_read"] = round(time.perf_counter() - started, 4)
+	log["mode"] = "journal" if journal is not None else "snapshot"
+	if journal is not None:
+		before, current_snapshot, snapshot_stats = journal_snapshot(baseline, journal["paths"], policy)
+		started = time.perf_counter()
+		added_paths, deleted_paths, modified_paths, deleted_entries = diff_journal(before, current_snapshot)
+	else:
+		current_snapshot, snapshot_stats = collect_snapshot(policy)
+		started = time.perf_counter()
+		added_paths, deleted_paths, modified_paths, deleted_entries = diff_snapshot(baseline, current_snapshot)
+	timings.update(walk=snapshot_stats["walk_sec"], hash=snapshot_stats["hash_sec"])
+	log["files"] = snapshot_stats["files"]
+	timings["diff"] = round(time.perf_counter() - started, 4)
+	baseline.close()
+	matcher = PolicyMatcher(policy)
+	target_is_editable = matcher.classify(target) == "editable"
 
 	changed_paths = sorted(set(added_paths + deleted_paths + modified_paths))
 	if not changed_paths:
@@ -230,10 +864,11 @@ def run_post(target: str, policy: dict[str, Any]) -> int:
 		print(f"✅ boundary audit ok: no file-system mutations for {target}.")
 		return 0
 
+	categories = {path: matcher.categories(path) for path in changed_paths}
 	readonly_violations = [
 		path
 		for path in changed_paths
-		if matches_any(path, policy["readonly_paths"])
+		if "readonly" in categories[path]
 	]
 	if readonly_violations:
 		fail(
@@ -242,7 +877,7 @@ def run_post(target: str, policy: dict[str, Any]) -> int:
 		)
 
 	deny_scope_violations = [
-		path for path in changed_paths if matches_any(path, hook_deny_scope)
+		path for path in changed_paths if "deny_scope" in categories[path]
 	]
 	if deny_scope_violations:
 		fail(
@@ -254,8 +889,7 @@ def run_post(target: str, policy: dict[str, Any]) -> int:
 		extra_paths = [
 			path
 			for path in changed_paths
-			if not matches_any(path, policy["editable_paths"])
-			and not matches_any(path, policy["readonly_paths"])
+			if not categories[path] & {"editable", "readonly"}
 		]
 		if extra_paths:
 			fail(
@@ -264,7 +898,7 @@ def run_post(target: str, policy: dict[str, Any]) -> int:
 			)
 	else:
 		editable_violations = [
-			path for path in changed_paths if matches_any(path, policy["editable_paths"])
+			path for path in changed_paths if "editable" in categories[path]
 		]
 		if editable_violations:
 			fail(
@@ -276,7 +910,7 @@ def run_post(target: str, policy: dict[str, Any]) -> int:
 	if deleted_paths and added_paths:
 		deleted_by_hash: dict[str, list[str]] = {}
 		for path in deleted_paths:
-			entry = baseline_snapshot[path]
+			entry = deleted_entries[path]
 			key = json.dumps(
 				{
 					"kind": entry.get("kind"),
@@ -314,11 +948,62 @@ def run_post(target: str, policy: dict[str, Any]) -> int:
 	return 0
 
 
+def bench_snapshot(policy: dict[str, Any]) -> dict[str, Any]:
+	runs: dict[str, Any] = {}
+	for name, use_index, workers in (
+		("cold_serial", False, 1),
+		("cold_parallel", False, None),
+		("index_prime", True, None),
+		("index_warm", True, None),
+	):
+		started = time.perf_counter()
+		_, stats = collect_snapshot(policy, use_index=use_index, workers=workers)
+		runs[name] = {"total_sec": round(time.perf_counter() - started, 4), **stats}
+	return {"roots": monitored_roots(policy), "hash_workers": hash_workers(), "runs": runs}
+
+
+def bench_matcher(policy: dict[str, Any], count: int = 20000) -> dict[str, Any]:
+	prefixes = [*monitored_roots(policy), "src/scripts", "docs"]
+	paths = [f"{prefixes[i % len(prefixes)]}/render_{i // 97}/chunk_{i:06d}.wav" for i in range(count)]
+	categories = policy_categories(policy)
+
+	def legacy(path: str) -> frozenset[str]:
+		# The pre-compiled-matcher behaviour: one fnmatch loop per category, as run_post used to do.
+		return frozenset(category for category, patterns in categories.items() if matches_any(path, patterns))
+
+	started = time.perf_counter()
+	legacy_results = [legacy(path) for path in paths]
+	legacy_sec = time.perf_counter() - started
+	started = time.perf_counter()
+	matcher = PolicyMatcher(policy)
+	compiled_results = [matcher.categories(path) for path in paths]
+	compiled_sec = time.perf_counter() - started
+	return {
+		"paths": count,
+		"patterns": len(matcher.patterns),
+		"fnmatch_sec": round(legacy_sec, 4),
+		"compiled_sec": round(compiled_sec, 4),
+		"speedup": round(legacy_sec / compiled_sec, 2) if compiled_sec else None,
+		"identical": legacy_results == compiled_results,
+	}
+
+
 def main() -> int:
 	parser = argparse.ArgumentParser()
-	parser.add_argument("--phase", choices=["pre", "post"], required=True)
+	mode = parser.add_mutually_exclusive_group(required=True)
+	mode.add_argument("--phase", choices=["pre", "post"])
+	mode.add_argument("--bench", choices=["snapshot", "matcher"], help="print a latency report instead of acting as a hook")
+	mode.add_argument("--watch", action="store_true", help="run the resident inotify watcher that post phases query")
 	args = parser.parse_args()
 
+	if args.watch:
+		return run_watch(load_policy())
+
+	if args.bench:
+		report = bench_snapshot(load_policy()) if args.bench == "snapshot" else bench_matcher(load_policy())
+		print(json.dumps(report, indent=2))
+		return 0
+
 	payload = load_hook_input()
 	tool_input = payload.get("tool_input", {})
 	raw_target = tool_input.get("file_path") or tool_input.get("path")
@@ -326,11 +1011,27 @@ def main() -> int:
 		fail("prompt-boundary-guard: missing tool_input.file_path/path")
 
 	target = normalize_path(str(raw_target))
+	started = time.perf_counter()
 	policy = load_policy()
+	log: dict[str, Any] = {
+		"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+		"phase": args.phase,
+		"target": target,
+		"timings_sec": {"policy_load": round(time.perf_counter() - started, 4)},
+	}
 
-	if args.phase == "pre":
-		return run_pre(target, policy)
-	return run_post(target, policy)
+	# Logged on violations too (fail() raises SystemExit), so slow failing edits show up as well.
+	status: int | str | None = 2
+	try:
+		status = run_pre(target, policy, log) if args.phase == "pre" else run_post(target, policy, log)
+	except SystemExit as exc:
+		status = exc.code
+		raise
+	finally:
+		log["exit_code"] = status
+		log["timings_sec"]["total"] = round(time.perf_counter() - started, 4)
+		log_timings(log)
+	return status
 
 
 if __name__ == "__main__":
@@ -1,92 +1,170 @@
-import yaml
+import argparse
 import json
 import sys
 import os
+import time
 from datetime import datetime
 
-def load_yaml(path):
-    with open(path, 'r') as f:
-        return yaml.safe_load(f)
+import numpy as np
+import pandas as pd
+
+from nav_model import RESULT_PATH, AssetValue, NavConfig, NavResult, load_yaml, render_report
+from price_store import STORE_ROOT, chart_symbol, read_history
+from stage_manifest import run_stage
+
+TIMESERIES_PATH = "reports/csv/nav_timeseries.csv"
 
 def load_json(path):
     with open(path, 'r') as f:
         return json.load(f)
 
-def calculate():
-    # Load configurations
-    holdings_config = load_yaml("config/holdings.yaml")
-    snapshots_dir = "snapshots/api"
-    latest_prices = load_json(os.path.join(snapshots_dir, "prices_latest.json"))
-
-    prices = latest_prices["prices"]
-    fx_rate = latest_prices["fx"]["USDJPY"]
-    
-    total_assets_jpy_t = 0.0
-    report_lines = []
-
-    report_lines.append(f"--- SBG NAV Audit Calculation ({datetime.now().isoformat()}) ---")
-    report_lines.append(f"FX Rate (USDJPY): {fx_rate}")
+def ticker_currencies(tickers_config):
+    return {chart_symbol(asset): asset["currency"] for asset in tickers_config["assets"]}
 
+def nav_frame(panel, holdings_config, currencies, net_debt_jpy_t=None):
+    # panel: one row per date (or scenario), one column per ticker plus USDJPY, NaN where nothing was observed.
+    # Each asset is valued for every row at once; a one-row panel is the single-snapshot calculation.
+    # A ticker absent from the panel falls back to its IR valuation (the snapshot audit flags that); a NaN
+    # price on a dated row stays NaN through NAV and discount instead of being papered over.
+    fx_rate = panel["USDJPY"].to_numpy(dtype=float)
+    values = {}
     for asset in holdings_config["holdings"]:
-        asset_id = asset["asset_id"]
-        val_method = asset["valuation_method"]
-        
-        current_val_jpy_t = 0.0
-        
-        if val_method == "MARKET_PRICE":
-            ticker = asset["ticker"]
-            if ticker in prices:
-                price = prices[ticker]
-                shares = asset.get("shares_owned", 0)
-                
-                # Check if price is in USD or JPY based on ticker/exchange logic (simplified for now)
-                # In a robust system, this would be explicit in tickers.yaml
-                if ticker in ["ARM", "TMUS"]:
-                    val_usd = price * shares
-                    current_val_jpy_t = (val_usd * fx_rate) / 1e12
-                else:
-                    # JPY tickers
-                    # Note: SB_CORP shares not provided by user, using IR valuation as fallback or if share count missing
-                    if shares > 0:
-                        current_val_jpy_t = (price * shares) / 1e12
-                    else:
-                        current_val_jpy_t = asset.get("ir_valuation_jpy", 0)
+        ir_value = float(asset.get("ir_valuation_jpy", 0))
+        current_val_jpy_t = np.full(len(panel), ir_value)
+        ticker = asset.get("ticker")
+
+        if asset["valuation_method"] == "MARKET_PRICE" and ticker in panel:
+            price = panel[ticker].to_numpy(dtype=float)
+            shares = asset.get("shares_owned", 0)
+            currency = currencies[ticker]
+            if currency == "USD":
+                current_val_jpy_t = (price * shares * fx_rate) / 1e12
+            elif currency == "JPY":
+                # Note: SB_CORP shares not provided by user, using IR valuation if share count missing
+                if shares > 0:
+                    current_val_jpy_t = (price * shares) / 1e12
             else:
-                # Fallback to IR valuation if price missing (Audit will flag this)
-                current_val_jpy_t = asset.get("ir_valuation_jpy", 0)
-        
-        elif val_method == "IR_FIXED":
-            current_val_jpy_t = asset.get("ir_valuation_jpy", 0)
-
-        total_assets_jpy_t += current_val_jpy_t
-        report_lines.append(f"Asset: {asset_id:<10} | Method: {val_method:<12} | Value: {current_val_jpy_t:>6.2f} T JPY")
-
-    net_debt_jpy_t = holdings_config["net_debt"]["value_jpy_t"]
-    nav_jpy_t = total_assets_jpy_t - net_debt_jpy_t
-    
+                raise ValueError(f"Unsupported currency {currency} for {ticker}")
+
+        values[asset["asset_id"]] = current_val_jpy_t
+
+    frame = pd.DataFrame(values, index=panel.index)
+    if net_debt_jpy_t is None:
+        net_debt_jpy_t = holdings_config["net_debt"]["value_jpy_t"]
     shares_outstanding_m = holdings_config["ir_benchmarks"]["shares_outstanding_m"]
-    nav_per_share = (nav_jpy_t * 1e12) / (shares_outstanding_m * 1e6)
-    
-    sbg_price = prices.get("9984.T", 0)
-    discount = (1 - (sbg_price / nav_per_share)) * 100 if nav_per_share > 0 else 0
-
-    report_lines.append("-" * 50)
-    report_lines.append(f"Total Assets:      {total_assets_jpy_t:>10.2f} T JPY")
-    report_lines.append(f"Net Debt:          {net_debt_jpy_t:>10.2f} T JPY")
-    report_lines.append(f"NAV (Total):       {nav_jpy_t:>10.2f} T JPY")
-    report_lines.append(f"NAV per Share:     {nav_per_share:>10.0f} JPY")
-    report_lines.append(f"SBG Stock Price:   {sbg_price:>10.0f} JPY")
-    report_lines.append(f"Discount Rate:     {discount:>10.2f}%")
-    report_lines.append("-" * 50)
+    frame["total_assets_jpy_t"] = frame[list(values)].sum(axis=1, skipna=False)
+    frame["net_debt_jpy_t"] = net_debt_jpy_t
+    frame["nav_jpy_t"] = frame["total_assets_jpy_t"] - net_debt_jpy_t
+    frame["nav_per_share_jpy"] = (frame["nav_jpy_t"] * 1e12) / (shares_outstanding_m * 1e6)
+    frame["usd_jpy"] = fx_rate
+    frame["sbg_price_jpy"] = panel["9984.T"].to_numpy(dtype=float) if "9984.T" in panel else 0.0
+    nav_per_share = frame["nav_per_share_jpy"].to_numpy()
+    frame["discount_pct"] = np.where(
+        nav_per_share > 0,
+        (1 - frame["sbg_price_jpy"].to_numpy() / np.where(nav_per_share > 0, nav_per_share, 1)) * 100,
+        np.where(np.isnan(nav_per_share), np.nan, 0.0),
+    )
+    return frame
+
+def build_result(config, latest_prices):
+    prices = latest_prices["prices"]
+    fx_rate = latest_prices["fx"]["USDJPY"]
+    panel = pd.DataFrame([{**prices, "USDJPY": fx_rate}])
+    row = nav_frame(panel, config.holdings, ticker_currencies(config.tickers)).iloc[0]
+    return NavResult(
+        calculated_at=datetime.now().isoformat(),
+        snapshot_timestamp=latest_prices.get("timestamp", ""),
+        source=latest_prices.get("source", "UNKNOWN"),
+        fx_usd_jpy=fx_rate,
+        prices=prices,
+        assets=[
+            AssetValue(asset["asset_id"], asset["valuation_method"], asset.get("ticker"), float(row[asset["asset_id"]]))
+            for asset in config.holdings["holdings"]
+        ],
+        total_assets_jpy_t=float(row["total_assets_jpy_t"]),
+        net_debt_jpy_t=float(row["net_debt_jpy_t"]),
+        nav_jpy_t=float(row["nav_jpy_t"]),
+        nav_per_share_jpy=float(row["nav_per_share_jpy"]),
+        sbg_price_jpy=float(row["sbg_price_jpy"]),
+        discount_pct=float(row["discount_pct"]),
+        provenance=latest_prices.get("provenance", {}),
+    )
+
+def calculate(config=None, latest_prices=None):
+    # Load configurations (nav:all passes them in, parsed once)
+    config = config or NavConfig.load()
+    if latest_prices is None:
+        latest_prices = load_json(os.path.join("snapshots/api", "prices_latest.json"))
+    result = build_result(config, latest_prices)
 
     # Output to stdout and save to reports
-    report_content = "\n".join(report_lines)
+    report_content = render_report(result)
     print(report_content)
-    
+
     out_path = "reports/markdown/latest_nav_calc.md"
     os.makedirs(os.path.dirname(out_path), exist_ok=True)
     with open(out_path, "w") as f:
         f.write(report_content)
+    result.save(RESULT_PATH)
+    return result
+
+def load_panel(start=None, end=None, store_root=STORE_ROOT):
+    # Only OBSERVED values are dated prices; a VERIFIED fallback used when a fetch failed is not that day's market.
+    history = read_history(
+        start=start, end=end, columns=["observed_at", "date", "ticker", "value"], store_root=store_root, provenance="OBSERVED"
+    ).to_pandas()
+    # Last observation per date and ticker; dates without one stay NaN (no carry-forward).
+    panel = history.sort_values("observed_at").groupby(["date", "ticker"])["value"].last().unstack("ticker")
+    if "USDJPY" not in panel:
+        return panel.iloc[0:0].assign(USDJPY=pd.Series(dtype=float))
+    # USD assets cannot be valued without that day's FX rate.
+    return panel.dropna(subset=["USDJPY"])
+
+def backfill(start=None, end=None, out_path=TIMESERIES_PATH, store_root=STORE_ROOT):
+    holdings_config = load_yaml("config/holdings.yaml")
+    currencies = ticker_currencies(load_yaml("config/tickers.yaml"))
+    t0 = time.perf_counter()
+    panel = load_panel(start, end, store_root)
+    t1 = time.perf_counter()
+    # Tickers whose price the valuation actually uses (a JPY holding without a share count is valued at IR).
+    priced = [
+        asset["ticker"] for asset in holdings_config["holdings"]
+        if asset["valuation_method"] == "MARKET_PRICE" and (currencies[asset["ticker"]] == "USD" or asset.get("shares_owned", 0) > 0)
+    ]
+    priced = list(dict.fromkeys([*priced, "9984.T"]))
+    # Every priced ticker gets a column: one never observed in the window is a gap on each date, not an IR value.
+    panel = panel.reindex(columns=list(dict.fromkeys([*panel.columns, *priced])))
+    frame = nav_frame(panel, holdings_config, currencies)
+    missing = panel[priced].isna()
+    frame["missing_prices"] = missing.dot(missing.columns + " ").str.strip()
+    t2 = time.perf_counter()
+    if frame.empty:
+        print(f"FAIL: No dated price/FX observations in {store_root}. Run nav:fetch first.")
+        sys.exit(1)
+    gaps = int(missing.any(axis=1).sum())
+    if gaps:
+        tickers = ", ".join(missing.columns[missing.any()])
+        print(f"WARNING: {gaps} of {len(frame)} dates lack an OBSERVED price ({tickers}); values that depend on it are left empty (see missing_prices)")
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    frame.rename_axis("date").round(4).to_csv(out_path)
+    print(f"INFO: NAV time series for {len(frame)} dates ({frame.index[0]} .. {frame.index[-1]}) written to {out_path}")
+    print(f"INFO: Panel load {(t1 - t0) * 1000:.1f} ms, valuation {(t2 - t1) * 1000:.1f} ms")
+    return frame
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Calculate SBG NAV from the latest snapshot, or backfill it from history")
+    parser.add_argument("--backfill", action="store_true", help="value every date in the price/FX history at once")
+    parser.add_argument("--start", help="first date, YYYY-MM-DD")
+    parser.add_argument("--end", help="last date, YYYY-MM-DD")
+    parser.add_argument("--out", default=TIMESERIES_PATH)
+    parser.add_argument("--store", default=STORE_ROOT)
+    parser.add_argument("--force", action="store_true", help="rerun even if the stage manifest says nothing changed")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    calculate()
+    args = parse_args()
+    if args.backfill:
+        backfill(args.start, args.end, args.out, args.store)
+    else:
+        run_stage("calculate", calculate, args.force)
@@ -0,0 +1,48 @@
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+# Local stand-in for the chart endpoint, for exercising fetch_market_data.py offline:
+#   python3 scripts/chart_stand_in.py --port 8765 --delay 0.2 --fail TMUS
+#   python3 scripts/fetch_market_data.py --base-url http://127.0.0.1:8765
+PRICES = {
+    "9984.T": 6755.0,
+    "ARM": 298.23,
+    "TMUS": 190.90,
+    "USDJPY=X": 159.08
+}
+
+
+def make_handler(delay, failing):
+    class ChartHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            symbol = unquote(urlparse(self.path).path.rsplit("/", 1)[-1])
+            time.sleep(delay)
+            if symbol in failing or symbol not in PRICES:
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = json.dumps({"chart": {"result": [{"meta": {"symbol": symbol, "regularMarketPrice": PRICES[symbol]}}]}}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ChartHandler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve fixed chart quotes for fetch_market_data.py")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to sleep per request")
+    parser.add_argument("--fail", nargs="*", default=[], help="symbols to answer with 404")
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.delay, set(args.fail)))
+    print(f"INFO: Chart stand-in on http://127.0.0.1:{args.port}")
+    server.serve_forever()
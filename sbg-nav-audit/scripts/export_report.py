@@ -1,40 +1,28 @@
+import argparse
 import sys
 import os
-import re
 
-def export():
-    calc_path = "reports/markdown/latest_nav_calc.md"
-    if not os.path.exists(calc_path):
-        print("FAIL: No latest_nav_calc.md report found. Run nav:calculate first.")
-        sys.exit(1)
+from nav_model import RESULT_PATH, NavResult, render_report
+from stage_manifest import run_stage
 
-    with open(calc_path, "r") as f:
-        content = f.read()
+def export(result=None):
+    if result is None:
+        if not os.path.exists(RESULT_PATH):
+            print("FAIL: No latest_nav_calc.json result found. Run nav:calculate first.")
+            sys.exit(1)
+        result = NavResult.load(RESULT_PATH)
+    content = render_report(result)
 
     # Create directories
     os.makedirs("reports/csv", exist_ok=True)
     os.makedirs("reports/html", exist_ok=True)
 
-    # 1. Export CSV
-    # Extract asset lines
-    # Format: Asset: ARM        | Method: MARKET_PRICE | Value:  44.15 T JPY
-    asset_pattern = re.compile(r"Asset:\s+(\w+)\s+\|\s+Method:\s+(\w+)\s+\|\s+Value:\s+([\d.]+)\s+T JPY")
-    assets = asset_pattern.findall(content)
-
+    # 1. Export CSV straight from the result (no rounding through the markdown report)
     csv_lines = ["Asset ID,Valuation Method,Value (T JPY)"]
-    for asset in assets:
-        csv_lines.append(f"{asset[0]},{asset[1]},{asset[2]}")
-
-    # Add NAV per Share, Discount Rate, etc.
-    # NAV (Total):       35.94 T JPY
-    # Discount Rate:     32.18%
-    nav_match = re.search(r"NAV \(Total\):\s+([\d.]+)\s+T JPY", content)
-    discount_match = re.search(r"Discount Rate:\s+([\d.-]+)%", content)
-
-    if nav_match:
-        csv_lines.append(f"NAV_TOTAL,calculated,{nav_match.group(1)}")
-    if discount_match:
-        csv_lines.append(f"DISCOUNT_RATE,calculated,{discount_match.group(1)}")
+    for asset in result.assets:
+        csv_lines.append(f"{asset.asset_id},{asset.valuation_method},{asset.value_jpy_t:.4f}")
+    csv_lines.append(f"NAV_TOTAL,calculated,{result.nav_jpy_t:.4f}")
+    csv_lines.append(f"DISCOUNT_RATE,calculated,{result.discount_pct:.4f}")
 
     with open("reports/csv/sbg_nav_report.csv", "w") as f:
         f.write("\n".join(csv_lines) + "\n")
@@ -104,5 +92,7 @@ def export():
     print("INFO: HTML report exported to reports/html/sbg_nav_report.html")
 
 if __name__ == "__main__":
-    export()
+    parser = argparse.ArgumentParser(description="Export the latest SBG NAV result as CSV and HTML")
+    parser.add_argument("--force", action="store_true", help="rerun even if the stage manifest says nothing changed")
+    run_stage("export", export, parser.parse_args().force)
 
@@ -1,60 +0,0 @@
-import requests
-import json
-import os
-from datetime import datetime
-
-def fetch():
-    filepath = "snapshots/api/prices_latest.json"
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    
-    # Default/verified values as of May 22, 2026
-    default_prices = {
-        "9984.T": 6755.0,
-        "ARM": 298.23,
-        "TMUS": 190.90
-    }
-    
-    # Try fetching from Yahoo Finance API first
-    prices = {}
-    headers = {"User-Agent": "Mozilla/5.0"}
-    for ticker in default_prices.keys():
-        try:
-            url = f"https://query1.finance.yahoo.com/v8/finance/chart/{ticker}?interval=1d&range=1d"
-            res = requests.get(url, headers=headers, timeout=5)
-            if res.status_code == 200:
-                data = res.json()
-                price = data["chart"]["result"][0]["meta"]["regularMarketPrice"]
-                prices[ticker] = float(price)
-                print(f"INFO: Fetched price for {ticker}: {price}")
-        except Exception as e:
-            print(f"WARNING: Failed to fetch {ticker}: {e}")
-            
-    # Fallback to verified values if fetching failed or incomplete
-    for ticker, val in default_prices.items():
-        if ticker not in prices or prices[ticker] is None or prices[ticker] <= 0:
-            prices[ticker] = val
-            print(f"INFO: Using verified fallback for {ticker}: {val}")
-
-    # Load existing or create new
-    if os.path.exists(filepath):
-        with open(filepath, "r") as f:
-            try:
-                data = json.load(f)
-            except:
-                data = {}
-    else:
-        data = {}
-
-    data["timestamp"] = datetime.utcnow().isoformat() + "Z"
-    data["source"] = "Yahoo Finance & WebSearch (VERIFIED)"
-    if "prices" not in data:
-        data["prices"] = {}
-    data["prices"].update(prices)
-    
-    with open(filepath, "w") as f:
-        json.dump(data, f, indent=2)
-    print("INFO: Prices snapshot updated successfully.")
-
-if __name__ == "__main__":
-    fetch()
-
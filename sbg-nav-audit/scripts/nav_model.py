@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+from dataclasses import asdict, dataclass, field
+
+import yaml
+
+# Machine-readable output of calculate(); run_audit and export_report read this instead of the markdown.
+RESULT_PATH = "reports/json/latest_nav_calc.json"
+FRESHNESS_LIMIT_SEC = 86400  # 24 hours
+
+
+def load_yaml(path):
+    with open(path, 'r') as f:
+        return yaml.safe_load(f)
+
+
+@dataclass
+class NavConfig:
+    holdings: dict
+    tickers: dict
+    fx: dict
+    thresholds: dict
+
+    @classmethod
+    def load(cls, config_dir="config"):
+        return cls(
+            holdings=load_yaml(os.path.join(config_dir, "holdings.yaml")),
+            tickers=load_yaml(os.path.join(config_dir, "tickers.yaml")),
+            fx=load_yaml(os.path.join(config_dir, "fx.yaml")),
+            thresholds=load_yaml(os.path.join(config_dir, "thresholds.yaml")),
+        )
+
+
+@dataclass
+class AssetValue:
+    asset_id: str
+    valuation_method: str
+    ticker: str | None
+    value_jpy_t: float
+
+
+@dataclass
+class NavResult:
+    calculated_at: str
+    snapshot_timestamp: str
+    source: str
+    fx_usd_jpy: float
+    prices: dict[str, float]
+    assets: list[AssetValue]
+    total_assets_jpy_t: float
+    net_debt_jpy_t: float
+    nav_jpy_t: float
+    nav_per_share_jpy: float
+    sbg_price_jpy: float
+    discount_pct: float
+    provenance: dict[str, str] = field(default_factory=dict)
+
+    def save(self, path=RESULT_PATH):
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, partial = tempfile.mkstemp(dir=directory, prefix=".latest_nav_calc.", suffix=".partial")
+        with os.fdopen(fd, "w") as f:
+            json.dump(asdict(self), f, indent=2)
+        os.replace(partial, path)
+
+    @classmethod
+    def load(cls, path=RESULT_PATH):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        data["assets"] = [AssetValue(**asset) for asset in data["assets"]]
+        return cls(**data)
+
+
+def render_report(result):
+    report_lines = []
+
+    report_lines.append(f"--- SBG NAV Audit Calculation ({result.calculated_at}) ---")
+    report_lines.append(f"FX Rate (USDJPY): {result.fx_usd_jpy}")
+
+    for asset in result.assets:
+        report_lines.append(f"Asset: {asset.asset_id:<10} | Method: {asset.valuation_method:<12} | Value: {asset.value_jpy_t:>6.2f} T JPY")
+
+    report_lines.append("-" * 50)
+    report_lines.append(f"Total Assets:      {result.total_assets_jpy_t:>10.2f} T JPY")
+    report_lines.append(f"Net Debt:          {result.net_debt_jpy_t:>10.2f} T JPY")
+    report_lines.append(f"NAV (Total):       {result.nav_jpy_t:>10.2f} T JPY")
+    report_lines.append(f"NAV per Share:     {result.nav_per_share_jpy:>10.0f} JPY")
+    report_lines.append(f"SBG Stock Price:   {result.sbg_price_jpy:>10.0f} JPY")
+    report_lines.append(f"Discount Rate:     {result.discount_pct:>10.2f}%")
+    report_lines.append("-" * 50)
+    return "\n".join(report_lines)
@@ -0,0 +1,150 @@
+import argparse
+import os
+import time
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+
+# Append-only history of every fetch: normalized/prices/month=YYYY-MM/ticker=XXX/part-<ns>-0.parquet
+# Month rather than day partitions: per-file open cost dominates tiny daily files, and compact() folds a
+# closed month into one file per ticker, so a year of history is ~12 files per ticker.
+STORE_ROOT = "normalized/prices"
+PARTITIONING = ds.partitioning(pa.schema([("month", pa.string()), ("ticker", pa.string())]), flavor="hive")
+SCHEMA = pa.schema([
+    ("observed_at", pa.timestamp("us", tz="UTC")),
+    ("month", pa.string()),
+    ("date", pa.string()),
+    ("ticker", pa.string()),
+    ("kind", pa.string()),
+    ("value", pa.float64()),
+    ("provenance", pa.string()),
+    ("source", pa.string()),
+    ("latency_ms", pa.float64()),
+])
+
+
+def chart_symbol(asset):
+    # tickers.yaml entry -> the symbol prices are fetched and stored under; TSE codes carry a ".T" suffix.
+    symbol = str(asset["ticker"])
+    if asset.get("exchange") == "TSE" and "." not in symbol:
+        symbol = f"{symbol}.T"
+    return symbol
+
+
+def snapshot_rows(data):
+    # Only values resolved by this fetch carry provenance; older keys merged into the snapshot are not re-appended.
+    observed_at = datetime.fromisoformat(data["timestamp"].replace("Z", "+00:00"))
+    rows = []
+    for kind, values in (("price", data.get("prices", {})), ("fx", data.get("fx", {}))):
+        for ticker, value in values.items():
+            if ticker not in data.get("provenance", {}):
+                continue
+            rows.append({
+                "observed_at": observed_at,
+                "month": observed_at.strftime("%Y-%m"),
+                "date": observed_at.date().isoformat(),
+                "ticker": ticker,
+                "kind": kind,
+                "value": float(value),
+                "provenance": data["provenance"][ticker],
+                "source": data.get("source"),
+                "latency_ms": data.get("latency_ms", {}).get(ticker),
+            })
+    return rows
+
+
+def append_snapshot(data, store_root=STORE_ROOT):
+    rows = snapshot_rows(data)
+    if not rows:
+        return 0
+    # A fresh basename per fetch makes every write a new file; existing partitions are never rewritten.
+    ds.write_dataset(
+        pa.Table.from_pylist(rows, schema=SCHEMA),
+        store_root,
+        format="parquet",
+        partitioning=PARTITIONING,
+        basename_template=f"part-{time.time_ns()}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    return len(rows)
+
+
+def compact(store_root=STORE_ROOT, current_month=None):
+    # Closed months only: the current month still receives appends. Write-then-rename, then drop the inputs;
+    # duplicate rows left by an interrupted run are removed the next time the partition is compacted.
+    current_month = current_month or datetime.utcnow().strftime("%Y-%m")
+    if not os.path.isdir(store_root):
+        return 0
+    compacted = 0
+    for month_dir in sorted(os.scandir(store_root), key=lambda entry: entry.name):
+        if not month_dir.name.startswith("month=") or month_dir.name[len("month="):] >= current_month:
+            continue
+        for ticker_dir in os.scandir(month_dir.path):
+            parts = sorted(entry.path for entry in os.scandir(ticker_dir.path) if entry.name.endswith(".parquet"))
+            if len(parts) < 2:
+                continue
+            table = pa.concat_tables([pq.ParquetFile(part).read() for part in parts])
+            table = table.group_by(table.column_names).aggregate([]).sort_by([("observed_at", "ascending")])
+            partial = os.path.join(ticker_dir.path, "_compact.partial")
+            pq.write_table(table, partial)
+            os.replace(partial, os.path.join(ticker_dir.path, f"part-{time.time_ns()}-c.parquet"))
+            for part in parts:
+                os.unlink(part)
+            compacted += 1
+    return compacted
+
+
+def open_store(store_root=STORE_ROOT):
+    return ds.dataset(
+        store_root,
+        schema=SCHEMA,
+        format="parquet",
+        partitioning=PARTITIONING,
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+
+
+def read_history(tickers=None, start=None, end=None, kind=None, columns=None, store_root=STORE_ROOT, provenance=None):
+    # month/ticker filters prune whole partitions before any file is opened; date and kind are pushed into
+    # the Parquet scan and checked against row-group statistics.
+    if not os.path.isdir(store_root):
+        return SCHEMA.empty_table() if columns is None else SCHEMA.empty_table().select(columns)
+    predicate = pc.scalar(True)
+    if tickers is not None:
+        predicate &= ds.field("ticker").isin(list(tickers))
+    if start is not None:
+        predicate &= (ds.field("month") >= str(start)[:7]) & (ds.field("date") >= str(start))
+    if end is not None:
+        predicate &= (ds.field("month") <= str(end)[:7]) & (ds.field("date") <= str(end))
+    if kind is not None:
+        predicate &= ds.field("kind") == kind
+    if provenance is not None:
+        predicate &= ds.field("provenance") == provenance
+    table = open_store(store_root).to_table(columns=columns, filter=predicate)
+    return table.sort_by([("observed_at", "ascending")]) if "observed_at" in table.column_names else table
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Query the append-only price/FX history")
+    parser.add_argument("--ticker", nargs="*", help="tickers or FX pairs (e.g. ARM USDJPY)")
+    parser.add_argument("--start", help="first date, YYYY-MM-DD")
+    parser.add_argument("--end", help="last date, YYYY-MM-DD")
+    parser.add_argument("--kind", choices=["price", "fx"])
+    parser.add_argument("--store", default=STORE_ROOT)
+    parser.add_argument("--compact", action="store_true", help="fold closed months into one file per ticker")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    t0 = time.perf_counter()
+    if args.compact:
+        print(f"INFO: Compacted {compact(args.store)} partitions in {(time.perf_counter() - t0) * 1000:.1f} ms")
+        raise SystemExit(0)
+    table = read_history(args.ticker, args.start, args.end, args.kind, store_root=args.store)
+    print(table.to_pandas().to_string(index=False))
+    print(f"INFO: {table.num_rows} observations read in {(time.perf_counter() - t0) * 1000:.1f} ms")
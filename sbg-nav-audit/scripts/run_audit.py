@@ -1,28 +1,23 @@
-import yaml
-import json
+import argparse
 import sys
 import os
 from datetime import datetime
 
-def load_yaml(path):
-    with open(path, 'r') as f:
-        return yaml.safe_load(f)
+from nav_model import FRESHNESS_LIMIT_SEC, RESULT_PATH, NavConfig, NavResult
+from stage_manifest import run_stage
 
-def load_json(path):
-    with open(path, 'r') as f:
-        return json.load(f)
+def run_audit(config=None, result=None):
+    # Load configs and results (nav:all passes them in)
+    config = config or NavConfig.load()
+    holdings_config = config.holdings
+    thresholds = config.thresholds
 
-def run_audit():
-    # Load configs and results
-    holdings_config = load_yaml("config/holdings.yaml")
-    thresholds = load_yaml("config/thresholds.yaml")
-    latest_prices = load_json("snapshots/api/prices_latest.json")
-    
-    # Check if calculation report exists
-    calc_report_path = "reports/markdown/latest_nav_calc.md"
-    if not os.path.exists(calc_report_path):
-        print("FAIL: No calculation report found. Run nav:calculate first.")
-        sys.exit(1)
+    # Check if calculation result exists
+    if result is None:
+        if not os.path.exists(RESULT_PATH):
+            print("FAIL: No calculation result found. Run nav:calculate first.")
+            sys.exit(1)
+        result = NavResult.load(RESULT_PATH)
 
     audit_results = []
     audit_results.append(f"--- SBG NAV Zero-Trust Audit Report ({datetime.now().isoformat()}) ---")
@@ -30,7 +25,7 @@ def run_audit():
     overall_pass = True
 
     # 1. Source Provenance Check
-    source = latest_prices.get("source", "UNKNOWN")
+    source = result.source
     if source == "UNKNOWN":
         audit_results.append("[FAIL] Source Provenance: Data source is UNKNOWN")
         overall_pass = False
@@ -38,11 +33,11 @@ def run_audit():
         audit_results.append(f"[PASS] Source Provenance: Data verified via {source}")
 
     # 2. Stale Data Check
-    timestamp_str = latest_prices.get("timestamp", "")
+    timestamp_str = result.snapshot_timestamp
     try:
         data_time = datetime.fromisoformat(timestamp_str.replace("Z", "+00:00"))
         delta = datetime.now(data_time.tzinfo) - data_time
-        if delta.total_seconds() > 86400: # 24 hours
+        if delta.total_seconds() > FRESHNESS_LIMIT_SEC:
             audit_results.append(f"[FAIL] Data Freshness: Data is {delta.total_seconds()/3600:.1f} hours old")
             overall_pass = False
         else:
@@ -52,7 +47,7 @@ def run_audit():
         overall_pass = False
 
     # 3. FX Anomaly Check
-    fx_val = latest_prices["fx"]["USDJPY"]
+    fx_val = result.fx_usd_jpy
     ir_fx = holdings_config["metadata"]["ir_usd_jpy"]
     fx_delta = abs(fx_val - ir_fx) / ir_fx
     if fx_delta > thresholds["anomalies"]["fx_delta_limit"]:
@@ -74,11 +69,8 @@ def run_audit():
     for asset in holdings_config["holdings"]:
         if asset["valuation_method"] == "MARKET_PRICE":
             ticker = asset.get("ticker")
-            if ticker not in latest_prices["prices"]:
-                # Note: SB_CORP shares missing but price is in latest_prices?
-                # Actually, our config has SB_CORP ticker 9434.T, let's see if it's in prices_latest.json
-                if ticker not in latest_prices["prices"]:
-                     missing_tickers.append(ticker)
+            if ticker not in result.prices:
+                missing_tickers.append(ticker)
     
     if missing_tickers:
         audit_results.append(f"[FAIL] Missing Tickers: {', '.join(missing_tickers)}")
@@ -102,6 +94,9 @@ def run_audit():
     os.makedirs(os.path.dirname(out_path), exist_ok=True)
     with open(out_path, "w") as f:
         f.write(report_content)
+    return overall_pass
 
 if __name__ == "__main__":
-    run_audit()
+    parser = argparse.ArgumentParser(description="Audit the latest SBG NAV result")
+    parser.add_argument("--force", action="store_true", help="rerun even if the stage manifest says nothing changed")
+    run_stage("audit", run_audit, parser.parse_args().force)
@@ -0,0 +1,49 @@
+import argparse
+import os
+import time
+
+from calculate_nav import calculate
+from export_report import export
+from fetch_market_data import CHART_BASE_URL, fetch
+from nav_model import RESULT_PATH, NavConfig, NavResult
+from run_audit import run_audit
+from stage_manifest import run_stage
+
+# nav:all: fetch -> calculate -> audit -> export in one interpreter, configs parsed once,
+# the snapshot and NavResult handed from stage to stage in memory.
+
+
+def run(base_url=CHART_BASE_URL, timeout=5.0, workers=8, force=False):
+    timings = {}
+    t0 = time.perf_counter()
+    config = NavConfig.load()
+    timings["config"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    latest_prices = fetch(base_url, timeout, workers, config=config)
+    timings["fetch"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    _, result = run_stage("calculate", lambda: calculate(config, latest_prices), force)
+    result = result or NavResult.load(RESULT_PATH)
+    timings["calculate"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    run_stage("audit", lambda: run_audit(config, result), force)
+    timings["audit"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    run_stage("export", lambda: export(result), force)
+    timings["export"] = time.perf_counter() - t0
+
+    print("INFO: Stage timings: " + ", ".join(f"{stage} {sec * 1000:.1f} ms" for stage, sec in timings.items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run fetch, calculate, audit and export in one process")
+    parser.add_argument("--base-url", default=os.environ.get("NAV_CHART_BASE_URL", CHART_BASE_URL))
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--force", action="store_true", help="rerun every stage regardless of its manifest")
+    args = parser.parse_args()
+    run(args.base_url.rstrip("/"), args.timeout, args.workers, args.force)
@@ -0,0 +1,131 @@
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from calculate_nav import load_json, load_yaml, nav_frame, ticker_currencies
+
+SNAPSHOT_PATH = "snapshots/api/prices_latest.json"
+OUTPUT_COLUMNS = ["total_assets_jpy_t", "net_debt_jpy_t", "nav_jpy_t", "nav_per_share_jpy", "usd_jpy", "sbg_price_jpy", "discount_pct"]
+
+
+def parse_range(text):
+    # "lo:hi:step" inclusive of hi, or a single value.
+    parts = [float(part) for part in text.split(":")]
+    if len(parts) == 1:
+        return np.array(parts)
+    lo, hi, step = parts
+    if step <= 0 or hi < lo:
+        raise ValueError(f"Invalid range {text}: expected lo:hi:step with lo <= hi and step > 0")
+    return np.round(np.arange(lo, hi + step / 2, step), 10)
+
+
+def scenario_axes(args, holdings_config, prices, fx):
+    # One axis per shock: (column, kind, key, values). Holdings are named by asset_id or ticker.
+    tickers = {asset["asset_id"]: asset.get("ticker") for asset in holdings_config["holdings"]}
+    axes = []
+    for spec in args.shock:
+        name, values = spec.split("=", 1)
+        ticker = tickers.get(name) or name
+        if ticker not in prices:
+            raise ValueError(f"No snapshot price for {name}; only market-priced holdings can be shocked")
+        axes.append((f"shock_{name}_pct", "price", ticker, parse_range(values)))
+    for spec in args.fx:
+        pair, values = spec.split("=", 1)
+        if pair not in fx:
+            raise ValueError(f"No snapshot FX rate for {pair}; only pairs in the snapshot can be shocked")
+        axes.append((f"shock_{pair}_abs", "fx", pair, parse_range(values)))
+    if args.net_debt:
+        axes.append(("shock_net_debt_jpy_t", "net_debt", None, parse_range(args.net_debt)))
+    return axes
+
+
+def iter_grid(axes, prices, fx, holdings_config, currencies, chunk_size):
+    # The Cartesian grid is never materialised: each chunk of flat indices is unravelled into per-axis shocks
+    # and valued as one panel, so memory stays at chunk_size rows however large the grid is.
+    shape = tuple(len(values) for *_, values in axes)
+    total = math.prod(shape)
+    base_net_debt = holdings_config["net_debt"]["value_jpy_t"]
+    for start in range(0, total, chunk_size):
+        flat = np.arange(start, min(start + chunk_size, total))
+        positions = np.unravel_index(flat, shape)
+        panel = pd.DataFrame({ticker: np.full(len(flat), float(price)) for ticker, price in prices.items()})
+        for pair, rate in fx.items():
+            panel[pair] = float(rate)
+        net_debt = np.full(len(flat), float(base_net_debt))
+        shocks = {}
+        for (column, kind, key, values), position in zip(axes, positions):
+            shock = values[position]
+            shocks[column] = shock
+            if kind == "price":
+                panel[key] = panel[key] * (1 + shock / 100)
+            elif kind == "fx":
+                panel[key] = panel[key] + shock
+            else:
+                net_debt = net_debt + shock
+        frame = nav_frame(panel, holdings_config, currencies, net_debt)
+        yield pd.concat([pd.DataFrame(shocks), frame[OUTPUT_COLUMNS]], axis=1)
+
+
+def run(args):
+    holdings_config = load_yaml("config/holdings.yaml")
+    currencies = ticker_currencies(load_yaml("config/tickers.yaml"))
+    latest_prices = load_json(args.snapshot)
+    prices, fx = latest_prices["prices"], latest_prices["fx"]
+    try:
+        axes = scenario_axes(args, holdings_config, prices, fx)
+    except ValueError as e:
+        print(f"FAIL: {e}")
+        sys.exit(1)
+    if not axes:
+        print("FAIL: No shocks given (use --shock, --fx or --net-debt).")
+        sys.exit(1)
+
+    t0 = time.perf_counter()
+    rows = 0
+    lowest = highest = None
+    if args.out != "-":
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    # Parquet for grids too large to read back as CSV; chunks become row groups as they are produced.
+    as_parquet = args.out.endswith(".parquet")
+    out = sys.stdout if args.out == "-" else None if as_parquet else open(args.out, "w")
+    try:
+        for chunk in iter_grid(axes, prices, fx, holdings_config, currencies, args.chunk_size):
+            if as_parquet:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                out = out or pq.ParquetWriter(args.out, table.schema)
+                out.write_table(table)
+            else:
+                chunk.round(4).to_csv(out, header=rows == 0, index=False)
+            rows += len(chunk)
+            low, high = chunk["discount_pct"].min(), chunk["discount_pct"].max()
+            lowest = low if lowest is None else min(lowest, low)
+            highest = high if highest is None else max(highest, high)
+    finally:
+        if out is not None and out is not sys.stdout:
+            out.close()
+    print(
+        f"INFO: {rows} scenarios in {(time.perf_counter() - t0) * 1000:.1f} ms; discount {lowest:.2f}% .. {highest:.2f}%",
+        file=sys.stderr,
+    )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Evaluate SBG NAV and discount over a Cartesian grid of shocks")
+    parser.add_argument("--shock", action="append", default=[], metavar="HOLDING=LO:HI:STEP", help="price shock in percent, e.g. ARM=-20:20:5")
+    parser.add_argument("--fx", action="append", default=[], metavar="PAIR=LO:HI:STEP", help="absolute FX shock, e.g. USDJPY=-10:10:2")
+    parser.add_argument("--net-debt", metavar="LO:HI:STEP", help="absolute net debt shock in T JPY")
+    parser.add_argument("--snapshot", default=SNAPSHOT_PATH)
+    parser.add_argument("--chunk-size", type=int, default=65536, help="scenarios valued per broadcast")
+    parser.add_argument("--out", default="-", help="CSV or .parquet path, or - for CSV on stdout")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    run(parse_args())
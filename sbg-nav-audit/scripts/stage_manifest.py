@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from nav_model import FRESHNESS_LIMIT_SEC, RESULT_PATH
+
+# Per-stage record of input and output hashes, like YT3's runs.input_hash/output_hash. A stage is skipped only
+# when its manifest is readable, every input hashes the same, every output still hashes to what was recorded
+# and the manifest has not expired. Anything else (missing, corrupt, stale) recomputes: fail closed.
+MANIFEST_DIR = "snapshots/manifests"
+MANIFEST_VERSION = 1
+SNAPSHOT_PATH = "snapshots/api/prices_latest.json"
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def script(name):
+    return os.path.join(SCRIPTS_DIR, name)
+
+
+def snapshot_expiry():
+    # The audit's freshness verdict flips once the snapshot passes the freshness limit.
+    # An unparseable timestamp expires immediately, so that audit is never reused.
+    with open(RESULT_PATH, 'r') as f:
+        timestamp = json.load(f)["snapshot_timestamp"]
+    try:
+        observed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except ValueError:
+        return datetime.now(timezone.utc).isoformat()
+    if observed.tzinfo is None:
+        observed = observed.replace(tzinfo=timezone.utc)
+    return (observed + timedelta(seconds=FRESHNESS_LIMIT_SEC)).isoformat()
+
+
+STAGES = {
+    "calculate": {
+        "inputs": ["config/holdings.yaml", "config/tickers.yaml", SNAPSHOT_PATH, script("calculate_nav.py"), script("nav_model.py"), script("price_store.py")],
+        "outputs": ["reports/markdown/latest_nav_calc.md", RESULT_PATH],
+    },
+    "audit": {
+        "inputs": [RESULT_PATH, "config/holdings.yaml", "config/thresholds.yaml", script("run_audit.py"), script("nav_model.py")],
+        "outputs": ["audit/results/latest_audit.txt"],
+        "expires": snapshot_expiry,
+    },
+    "export": {
+        "inputs": [RESULT_PATH, script("export_report.py"), script("nav_model.py")],
+        "outputs": ["reports/csv/sbg_nav_report.csv", "reports/html/sbg_nav_report.html"],
+    },
+}
+
+
+def file_sha256(path):
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def digests(paths):
+    return {os.path.relpath(path): file_sha256(path) for path in paths}
+
+
+def combined_hash(file_digests):
+    return hashlib.sha256(json.dumps(file_digests, sort_keys=True).encode()).hexdigest()
+
+
+def manifest_path(stage):
+    return os.path.join(MANIFEST_DIR, f"{stage}.json")
+
+
+def stale_reason(stage):
+    spec = STAGES[stage]
+    try:
+        with open(manifest_path(stage), 'r') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return "no manifest", None
+    except (OSError, ValueError) as e:
+        return f"unreadable manifest: {e}", None
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("stage") != stage:
+        return "manifest from another version", None
+    inputs = digests(spec["inputs"])
+    if manifest.get("inputs") != inputs:
+        changed = sorted(path for path in inputs if manifest.get("inputs", {}).get(path) != inputs[path])
+        return "inputs changed: " + ", ".join(changed or ["input set"]), None
+    for path, recorded in manifest.get("outputs", {}).items():
+        if recorded is None or file_sha256(path) != recorded:
+            return f"output missing or modified: {path}", None
+    if set(manifest.get("outputs", {})) != set(digests(spec["outputs"])):
+        return "output set changed", None
+    expires_at = manifest.get("expires_at")
+    if expires_at and datetime.now(timezone.utc) >= datetime.fromisoformat(expires_at):
+        return f"expired at {expires_at}", None
+    return None, manifest
+
+
+def record(stage, inputs):
+    spec = STAGES[stage]
+    outputs = digests(spec["outputs"])
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "stage": stage,
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "input_hash": combined_hash(inputs),
+        "output_hash": combined_hash(outputs),
+        "inputs": inputs,
+        "outputs": outputs,
+        "expires_at": spec["expires"]() if "expires" in spec else None,
+    }
+    os.makedirs(MANIFEST_DIR, exist_ok=True)
+    fd, partial = tempfile.mkstemp(dir=MANIFEST_DIR, prefix=f".{stage}.", suffix=".partial")
+    with os.fdopen(fd, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(partial, manifest_path(stage))
+
+
+def run_stage(stage, fn, force=False):
+    # Returns (ran, value); value is None when the stage was skipped.
+    reason, manifest = ("forced", None) if force else stale_reason(stage)
+    if reason is None:
+        print(f"INFO: {stage}: inputs unchanged since {manifest['recorded_at']} (input_hash {manifest['input_hash'][:12]}), skipping")
+        return False, None
+    print(f"INFO: {stage}: recomputing ({reason})")
+    # Inputs are hashed before the stage reads them, so an input edited mid-run makes the manifest stale.
+    inputs = digests(STAGES[stage]["inputs"])
+    value = fn()
+    record(stage, inputs)
+    return True, value
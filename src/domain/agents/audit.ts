@@ -1,4 +1,5 @@
 import { execSync } from "node:child_process";
+import net from "node:net";
 import path from "node:path";
 import fs from "fs-extra";
 import { z } from "zod";
@@ -26,6 +27,11 @@ import type {
 import { compareVoiceMaps, getCanonicalVoiceMap } from "../voice_registry.js";
 import { MetaAuditLayer } from "./meta_audit_layer.js";
 
+// A hung forensic worker or script must surface as INFRA_FAIL instead of blocking the audit agent.
+const VOICE_FORENSIC_TIMEOUT_MS = Number(
+	process.env.YT3_VOICE_FORENSIC_TIMEOUT_MS || 10 * 60 * 1000,
+);
+
 const SemanticAuditResultSchema = z.object({
 	content_structure: z.object({
 		passed: z.boolean(),
@@ -477,17 +483,29 @@ export class AuditAgent extends BaseAgent {
 			PYTHONPATH: "",
 			PATH: `${repoVenvBin}:${process.env.PATH || ""}`,
 		};
+		// Resident worker (`task voice:worker`) keeps torch and ECAPA loaded between audits.
+		const workerSocket = process.env.YT3_VOICE_FORENSIC_SOCKET;
+		// Centroids are stored per run in evolution.db so voice drift can be compared across episodes.
+		const runId = state.run_id || path.basename(this.store.runDir);
+		const channel = state.bucket || "unknown";
 
 		if (!fs.existsSync(manifestPath)) return {};
 
 		try {
-			const output = execSync(
-				`"${pythonBin}" "${pythonScript}" "${manifestPath}"`,
-				{
-					encoding: "utf-8",
-					env: cleanPythonEnv,
-				},
-			);
+			const output = workerSocket
+				? await this.requestForensicWorker(workerSocket, {
+						manifest: manifestPath,
+						run_id: runId,
+						channel,
+					})
+				: execSync(
+						`"${pythonBin}" "${pythonScript}" "${manifestPath}" --run-id "${runId}" --channel "${channel}"`,
+						{
+							encoding: "utf-8",
+							env: cleanPythonEnv,
+							timeout: VOICE_FORENSIC_TIMEOUT_MS,
+						},
+					);
 			const report = JSON.parse(output);
 			evidence.voice_forensic = report;
 
@@ -523,6 +541,43 @@ export class AuditAgent extends BaseAgent {
 		return checks;
 	}
 
+	private requestForensicWorker(
+		socketPath: string,
+		request: { manifest: string; run_id: string; channel: string },
+	): Promise<string> {
+		return new Promise((resolve, reject) => {
+			let buffer = "";
+			const socket = net.createConnection(socketPath, () => {
+				socket.write(`${JSON.stringify(request)}\n`);
+			});
+			socket.setEncoding("utf-8");
+			// The worker writes nothing until the audit is done, so an idle timeout bounds the whole request.
+			socket.setTimeout(VOICE_FORENSIC_TIMEOUT_MS, () => {
+				socket.destroy();
+				reject(
+					new Error(
+						`Voice forensic worker at ${socketPath} did not answer within ${VOICE_FORENSIC_TIMEOUT_MS} ms`,
+					),
+				);
+			});
+			socket.on("data", (data: string) => {
+				buffer += data;
+				const newline = buffer.indexOf("\n");
+				if (newline === -1) return;
+				socket.end();
+				resolve(buffer.slice(0, newline));
+			});
+			socket.on("error", reject);
+			socket.on("end", () =>
+				reject(
+					new Error(
+						`Voice forensic worker at ${socketPath} closed without a response`,
+					),
+				),
+			);
+		});
+	}
+
 	private auditGenerationDynamics(
 		state: AgentState,
 		evidence: Record<string, unknown>,
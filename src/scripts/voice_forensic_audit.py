@@ -1,71 +1,1604 @@
 import os
 import json
 import sys
-import torch
+import argparse
+import functools
+import glob
+import hashlib
+import sqlite3
+import time
+import multiprocessing
+import socketserver
+import statistics
+import struct
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import librosa
-from speechbrain.inference.speaker import EncoderClassifier
 import numpy as np
+from scipy.signal import lfilter, resample_poly
 
-def main():
-    manifest_path = sys.argv[1]
-    audio_dir = os.path.dirname(manifest_path)
+MODEL_ID = "speechbrain/spkrec-ecapa-voxceleb"
+SAMPLE_RATE = 16000
+COLLAPSE_THRESHOLD = 0.85
+VAD_FRAME_SEC = 0.03
+VAD_HANGOVER_SEC = 0.15
+VAD_FLOOR_DBFS = -60.0
+LOUDNESS_BLOCK_SEC = 0.4
+LOUDNESS_HOP_SEC = 0.1
+CLIP_LEVEL = 0.999
+SLOT_PENDING, SLOT_CACHED, SLOT_FAILED = 0, 1, 2
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_EVOLUTION_DB = os.path.join(ROOT, "db", "evolution.db")
+SCHEMA_PATH = os.path.join(ROOT, "db", "schema.sql")
+DEFAULT_CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "yt3",
+    "voice_embeddings.sqlite",
+)
 
-    with open(manifest_path, 'r') as f:
-        manifest = json.load(f)
 
-    classifier = EncoderClassifier.from_hparams(source="speechbrain/spkrec-ecapa-voxceleb")
+def file_sha256(path):
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class EmbeddingCache:
+    # Keyed by audio content, not path: re-rendered chunks miss, untouched chunks hit.
+    def __init__(self, path, max_bytes):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        # Autocommit in WAL mode: the resident worker, one-shot audits, bulk and follow share this file, so no
+        # write lock may be held past a single statement (an implicit transaction would last the whole audit).
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                audio_sha256 TEXT NOT NULL,
+                model_id TEXT NOT NULL,
+                sample_rate INTEGER NOT NULL,
+                embedding BLOB NOT NULL,
+                nbytes INTEGER NOT NULL,
+                last_used_ns INTEGER NOT NULL,
+                PRIMARY KEY (audio_sha256, model_id, sample_rate)
+            )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_lru ON embeddings(last_used_ns)")
+        # Signal metrics depend only on the audio, not the encoder, so they are keyed without model_id.
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS signal_metrics (
+                audio_sha256 TEXT NOT NULL,
+                sample_rate INTEGER NOT NULL,
+                metrics TEXT NOT NULL,
+                blocks BLOB NOT NULL,
+                PRIMARY KEY (audio_sha256, sample_rate)
+            )"""
+        )
+
+    def touch(self, key):
+        # Bumps the LRU stamp; true when the embedding is cached. Does not count towards hits or misses.
+        return self.conn.execute(
+            "UPDATE embeddings SET last_used_ns = ? WHERE audio_sha256 = ? AND model_id = ? AND sample_rate = ?",
+            (time.time_ns(), *key),
+        ).rowcount > 0
+
+    def record(self, found):
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return found
+
+    def has(self, key):
+        return self.record(self.touch(key))
+
+    def has_chunk(self, key):
+        # A manifest chunk is only a hit when its signal metrics are cached too; otherwise it is decoded again.
+        return self.record(self.has_metrics(key[0]) and self.touch(key))
+
+    def read(self, key):
+        row = self.conn.execute(
+            "SELECT embedding FROM embeddings WHERE audio_sha256 = ? AND model_id = ? AND sample_rate = ?",
+            key,
+        ).fetchone()
+        return np.frombuffer(row[0], dtype=np.float32).copy()
+
+    def get(self, key):
+        return self.read(key) if self.has(key) else None
+
+    def put(self, key, embedding):
+        blob = np.ascontiguousarray(embedding, dtype=np.float32).tobytes()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?, ?)",
+            (*key, blob, len(blob), time.time_ns()),
+        )
+
+    def has_metrics(self, audio_sha256):
+        return self.conn.execute(
+            "SELECT 1 FROM signal_metrics WHERE audio_sha256 = ? AND sample_rate = ?", (audio_sha256, SAMPLE_RATE)
+        ).fetchone() is not None
+
+    def read_metrics(self, audio_sha256):
+        metrics, blocks = self.conn.execute(
+            "SELECT metrics, blocks FROM signal_metrics WHERE audio_sha256 = ? AND sample_rate = ?", (audio_sha256, SAMPLE_RATE)
+        ).fetchone()
+        return {**json.loads(metrics), "blocks": np.frombuffer(blocks, dtype=np.float32).copy()}
+
+    def put_metrics(self, audio_sha256, metrics):
+        scalars = {name: value for name, value in metrics.items() if name != "blocks"}
+        self.conn.execute(
+            "INSERT OR REPLACE INTO signal_metrics VALUES (?, ?, ?, ?)",
+            (audio_sha256, SAMPLE_RATE, json.dumps(scalars), np.ascontiguousarray(metrics["blocks"], dtype=np.float32).tobytes()),
+        )
+
+    def evict(self):
+        # The budget covers embeddings plus the signal metrics that live and die with them: a metrics row
+        # is freed once the last embedding of its audio is evicted.
+        self.conn.execute("DELETE FROM signal_metrics WHERE audio_sha256 NOT IN (SELECT audio_sha256 FROM embeddings)")
+        metrics_bytes = dict(self.conn.execute(
+            "SELECT audio_sha256, SUM(length(metrics) + length(blocks)) FROM signal_metrics GROUP BY audio_sha256"
+        ))
+        total = self.conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM embeddings").fetchone()[0] + sum(metrics_bytes.values())
+        if total <= self.max_bytes:
+            return
+        remaining = dict(self.conn.execute("SELECT audio_sha256, COUNT(*) FROM embeddings GROUP BY audio_sha256"))
+        victims = []
+        for sha, model_id, sample_rate, nbytes in self.conn.execute(
+            "SELECT audio_sha256, model_id, sample_rate, nbytes FROM embeddings ORDER BY last_used_ns ASC"
+        ):
+            if total <= self.max_bytes:
+                break
+            victims.append((sha, model_id, sample_rate))
+            total -= nbytes
+            remaining[sha] -= 1
+            if not remaining[sha]:
+                total -= metrics_bytes.get(sha, 0)
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany(
+                "DELETE FROM embeddings WHERE audio_sha256 = ? AND model_id = ? AND sample_rate = ?",
+                victims,
+            )
+            self.conn.execute("DELETE FROM signal_metrics WHERE audio_sha256 NOT IN (SELECT audio_sha256 FROM embeddings)")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        self.evicted += len(victims)
+
+    def close(self):
+        self.evict()
+        self.conn.close()
+
+    def stats(self):
+        return {"enabled": True, "path": self.path, "hits": self.hits, "misses": self.misses, "evicted": self.evicted}
+
+
+class CentroidStore:
+    # Per-run speaker centroids in evolution.db as little-endian float32 blobs. All rows for the model are
+    # held as one unit-normalised matrix, so "nearest historical voices" is a single matmul, not a table scan.
+    def __init__(self, path, model_id=MODEL_ID):
+        self.path = path
+        self.model_id = model_id
+        self.conn = sqlite3.connect(path)
+        with open(SCHEMA_PATH, 'r') as f:
+            self.conn.executescript(f.read())
+        self.load()
+
+    def version(self):
+        # Row count plus highest id: ids are AUTOINCREMENT, so any insert or delete by another writer moves one.
+        return self.conn.execute(
+            "SELECT COUNT(*), COALESCE(MAX(id), 0) FROM voice_centroids WHERE model_id = ?", (self.model_id,)
+        ).fetchone()
+
+    def load(self):
+        t0 = time.perf_counter()
+        self.loaded = self.version()
+        rows = self.conn.execute(
+            "SELECT run_id, channel, speaker, chunk_count, dim, centroid FROM voice_centroids WHERE model_id = ? ORDER BY id",
+            (self.model_id,),
+        ).fetchall()
+        self.labels = [(run_id, channel, speaker, chunk_count) for run_id, channel, speaker, chunk_count, _, _ in rows]
+        dims = {dim for *_, dim, _ in rows}
+        if len(dims) > 1:
+            raise ValueError(f"voice_centroids holds mixed dimensions {sorted(dims)} for {self.model_id}")
+        dim = dims.pop() if dims else 0
+        self.unit = unit_rows(np.frombuffer(b"".join(blob for *_, blob in rows), dtype="<f4").reshape(len(rows), dim).astype(np.float32))
+        self.load_sec = time.perf_counter() - t0
+
+    def refresh(self):
+        # Another audit process writing the same evolution.db leaves the resident matrix stale; re-read it then.
+        if self.version() != self.loaded:
+            self.load()
 
-    speaker_embeddings = {} 
+    def __len__(self):
+        return len(self.labels)
 
+    def centroids(self, run_id):
+        rows = self.conn.execute(
+            "SELECT speaker, dim, centroid FROM voice_centroids WHERE run_id = ? AND model_id = ? ORDER BY id",
+            (run_id, self.model_id),
+        ).fetchall()
+        return [speaker for speaker, _, _ in rows], [np.frombuffer(blob, dtype="<f4").astype(np.float64) for _, _, blob in rows]
+
+    def nearest(self, vectors, k, exclude_run=None):
+        # (row, similarity) pairs per query vector, best first; the run being audited never matches itself.
+        if not len(self) or not len(vectors):
+            return [[] for _ in vectors]
+        sims = unit_rows(np.asarray(vectors, dtype=np.float32)) @ self.unit.T
+        if exclude_run is not None:
+            sims[:, [i for i, label in enumerate(self.labels) if label[0] == exclude_run]] = -np.inf
+        k = min(k, sims.shape[1])
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_sims, axis=1)
+        return [
+            [(j, float(sim)) for j, sim in zip(ids, values) if sim > -np.inf]
+            for ids, values in zip(np.take_along_axis(top, order, axis=1).tolist(), np.take_along_axis(top_sims, order, axis=1).tolist())
+        ]
+
+    def store(self, run_id, channel, speakers, centroids, counts):
+        # Re-auditing a run replaces its rows; the in-memory matrix is rebuilt from labels, not re-read,
+        # unless another writer has touched the table since the last load.
+        stale = self.version() != self.loaded
+        blobs = [np.ascontiguousarray(centroid, dtype="<f4").tobytes() for centroid in centroids]
+        self.conn.execute("DELETE FROM voice_centroids WHERE run_id = ? AND model_id = ?", (run_id, self.model_id))
+        self.conn.executemany(
+            "INSERT INTO voice_centroids (run_id, channel, speaker, model_id, sample_rate, dim, chunk_count, centroid) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(run_id, channel, speaker, self.model_id, SAMPLE_RATE, len(centroid), int(count), blob) for speaker, centroid, count, blob in zip(speakers, centroids, counts, blobs)],
+        )
+        self.conn.commit()
+        if stale:
+            self.load()
+            return
+        keep = [i for i, label in enumerate(self.labels) if label[0] != run_id]
+        self.labels = [self.labels[i] for i in keep] + [(run_id, channel, speaker, int(count)) for speaker, count in zip(speakers, counts)]
+        added = unit_rows(np.asarray(centroids, dtype=np.float32))
+        self.unit = np.concatenate([self.unit[keep], added]) if keep else added
+        self.loaded = self.version()
+
+    def close(self):
+        self.conn.close()
+
+
+def voice_history(store, run_id, channel, speakers, centroids, counts, k):
+    # Nearest stored voices per speaker from earlier runs, then this run's centroids are recorded.
+    t0 = time.perf_counter()
+    matches = store.nearest(centroids, k, exclude_run=run_id)
+    query_sec = time.perf_counter() - t0
+    nearest = {
+        speaker: [
+            {"run_id": store.labels[j][0], "channel": store.labels[j][1], "speaker": store.labels[j][2], "similarity": sim}
+            for j, sim in row
+        ]
+        for speaker, row in zip(speakers, matches)
+    }
+    if len(speakers):
+        store.store(run_id, channel, speakers, centroids, counts)
+    return {
+        "run_id": run_id,
+        "channel": channel,
+        "stored_speakers": len(speakers),
+        "indexed_centroids": len(store),
+        "index_load_ms": round(store.load_sec * 1000, 3),
+        "query_ms": round(query_sec * 1000, 3),
+        "nearest": nearest,
+    }
+
+
+def chunk_target(chunk, audio_dir):
+    speaker = chunk.get('script_speaker') or chunk.get('speaker')
+    audio_path = chunk.get('output_path') or os.path.join(audio_dir, chunk.get('filename', ''))
+
+    if not speaker or not audio_path or not os.path.exists(audio_path):
+        return None
+    return speaker, audio_path
+
+
+def collect_chunks(manifest, audio_dir):
+    chunks = []
     for chunk in manifest.get('chunks', []):
-        speaker = chunk.get('script_speaker') or chunk.get('speaker')
-        audio_path = chunk.get('output_path') or os.path.join(audio_dir, chunk.get('filename', ''))
-        
-        if not speaker or not audio_path or not os.path.exists(audio_path):
-            continue
-        
+        target = chunk_target(chunk, audio_dir)
+        if target is not None:
+            chunks.append(target)
+    return chunks
+
+
+def decode_audio(audio_path):
+    # Load with librosa, resample to 16kHz
+    signal, _ = librosa.load(audio_path, sr=SAMPLE_RATE)
+    if len(signal) == 0:
+        raise ValueError("empty signal")
+    return np.ascontiguousarray(signal, dtype=np.float32)
+
+
+def voiced_mask(signal, vad_db):
+    # Energy VAD over 30ms frames: voiced means within vad_db of the chunk's loudest frame and above an
+    # absolute floor, widened by a short hangover so consonant onsets and word tails survive.
+    frame = int(VAD_FRAME_SEC * SAMPLE_RATE)
+    count = len(signal) // frame
+    if count == 0:
+        return np.ones(0, dtype=bool), frame
+    frames = signal[:count * frame].reshape(count, frame)
+    level = 10 * np.log10(np.mean(np.square(frames, dtype=np.float64), axis=1) + 1e-12)
+    voiced = (level > level.max() + vad_db) & (level > VAD_FLOOR_DBFS)
+    pad = int(VAD_HANGOVER_SEC / VAD_FRAME_SEC)
+    # "same" would return max(count, kernel) frames for chunks shorter than the kernel; slice "full" back instead.
+    voiced = np.convolve(voiced, np.ones(2 * pad + 1), mode="full")[pad:pad + count] > 0
+    return voiced, frame
+
+
+def trim_for_embedding(signal, vad_db=None, max_windows=None, window_sec=3.0):
+    # Silence (room tone, breaths, long pauses) is cut before the encoder; a chunk with no voiced frame is kept
+    # whole rather than dropped. max_windows then caps what is left at N evenly spaced window_sec windows.
+    if vad_db is not None:
+        voiced, frame = voiced_mask(signal, vad_db)
+        if voiced.any() and not voiced.all():
+            keep = np.zeros(len(signal), dtype=bool)
+            keep[:len(voiced) * frame] = np.repeat(voiced, frame)
+            signal = signal[keep]
+    if max_windows:
+        width = int(window_sec * SAMPLE_RATE)
+        if len(signal) > max_windows * width:
+            starts = np.linspace(0, len(signal) - width, max_windows).astype(np.int64)
+            signal = signal[starts[:, None] + np.arange(width)].reshape(-1)
+    return np.ascontiguousarray(signal, dtype=np.float32)
+
+
+def k_weighting(sample_rate):
+    # BS.1770 pre-filter (high shelf, then RLB high-pass) designed for sample_rate rather than hard-coded for 48 kHz.
+    k = np.tan(np.pi * 1681.974450955533 / sample_rate)
+    q = 0.7071752369554196
+    vh = 10 ** (3.999843853973347 / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = ([(vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0], [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0])
+    k = np.tan(np.pi * 38.13547087602444 / sample_rate)
+    q = 0.5003270373238773
+    a0 = 1 + k / q + k * k
+    highpass = ([1.0, -2.0, 1.0], [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0])
+    return shelf, highpass
+
+
+def to_db(power_or_amplitude, scale=10):
+    return float(scale * np.log10(power_or_amplitude)) if power_or_amplitude > 0 else None
+
+
+def gated_loudness(blocks):
+    # BS.1770 integrated loudness from 400 ms block mean squares: -70 LUFS absolute gate, then -10 LU relative gate.
+    blocks = blocks[-0.691 + 10 * np.log10(np.maximum(blocks, 1e-20)) > -70.0]
+    if len(blocks) == 0:
+        return None
+    relative = -0.691 + 10 * np.log10(blocks.mean()) - 10.0
+    gated = blocks[-0.691 + 10 * np.log10(blocks) > relative]
+    return round(float(-0.691 + 10 * np.log10(gated.mean())), 2)
+
+
+def signal_metrics(signal):
+    # Everything is read off the signal decoded for embedding, so loudness checks cost no second decode.
+    # Block mean squares are kept so a speaker's integrated loudness can be gated over all of its chunks.
+    shelf, highpass = k_weighting(SAMPLE_RATE)
+    weighted = lfilter(*highpass, lfilter(*shelf, signal.astype(np.float64)))
+    width, hop = int(LOUDNESS_BLOCK_SEC * SAMPLE_RATE), int(LOUDNESS_HOP_SEC * SAMPLE_RATE)
+    energy = np.concatenate([[0.0], np.cumsum(np.square(weighted))])
+    starts = np.arange(0, len(weighted) - width + 1, hop)
+    blocks = (energy[starts + width] - energy[starts]) / width
+    # True peak per BS.1770 annex 2: 4x oversampled sample peak.
+    true_peak = float(np.max(np.abs(resample_poly(signal, 4, 1)))) if len(signal) else 0.0
+    frame = int(VAD_FRAME_SEC * SAMPLE_RATE)
+    count = len(signal) // frame
+    frame_level = 10 * np.log10(np.mean(np.square(signal[:count * frame].reshape(count, frame), dtype=np.float64), axis=1) + 1e-12)
+    return {
+        "duration_sec": round(len(signal) / SAMPLE_RATE, 3),
+        "integrated_lufs": gated_loudness(blocks),
+        "true_peak_dbtp": round(to_db(true_peak, 20), 2) if true_peak > 0 else None,
+        "sample_peak_dbfs": round(to_db(float(np.max(np.abs(signal))), 20), 2) if len(signal) and np.any(signal) else None,
+        "clipping_ratio": round(float(np.mean(np.abs(signal) >= CLIP_LEVEL)), 6) if len(signal) else 0.0,
+        "silence_ratio": round(float(np.mean(frame_level < VAD_FLOOR_DBFS)), 4) if count else 1.0,
+        "blocks": blocks.astype(np.float32),
+    }
+
+
+def speaker_signal_metrics(chunk_metrics):
+    # Pooled per speaker: loudness gated over the union of blocks, worst true peak, duration-weighted ratios.
+    report = {}
+    for speaker in dict.fromkeys(speaker for speaker, _ in chunk_metrics):
+        rows = [metrics for owner, metrics in chunk_metrics if owner == speaker]
+        duration = sum(row["duration_sec"] for row in rows)
+        peaks = [row["true_peak_dbtp"] for row in rows if row["true_peak_dbtp"] is not None]
+        report[speaker] = {
+            "chunks": len(rows),
+            "duration_sec": round(duration, 3),
+            "integrated_lufs": gated_loudness(np.concatenate([row["blocks"] for row in rows]).astype(np.float64)),
+            "max_true_peak_dbtp": max(peaks) if peaks else None,
+            "clipping_ratio": round(sum(row["clipping_ratio"] * row["duration_sec"] for row in rows) / duration, 6) if duration else 0.0,
+            "silence_ratio": round(sum(row["silence_ratio"] * row["duration_sec"] for row in rows) / duration, 4) if duration else 1.0,
+        }
+    return report
+
+
+def signal_report(measured):
+    # measured: (speaker, audio_path, metrics) for every chunk whose metrics were decoded or read from the cache.
+    return {
+        "measured_on": f"{SAMPLE_RATE} Hz mono decode",
+        "clip_level": CLIP_LEVEL,
+        "silence_floor_dbfs": VAD_FLOOR_DBFS,
+        "chunks": [
+            {"audio_path": audio_path, "speaker": speaker, **{name: value for name, value in metrics.items() if name != "blocks"}}
+            for speaker, audio_path, metrics in measured
+        ],
+        "speakers": speaker_signal_metrics([(speaker, metrics) for speaker, _, metrics in measured]),
+    }
+
+
+def decode_for_embedding(audio_path, trim=None):
+    # Runs in the decode pool, so trimming and signal metrics are parallel too.
+    # Returns (signal to embed, decoded sample count, metrics of the untrimmed signal).
+    signal = decode_audio(audio_path)
+    return (trim_for_embedding(signal, *trim) if trim else signal), len(signal), signal_metrics(signal)
+
+
+def trim_settings(args):
+    if args.vad_db is None and not args.max_windows:
+        return None
+    return (args.vad_db, args.max_windows, args.window_sec)
+
+
+def embedding_variant(args):
+    # Trimmed and untrimmed embeddings of the same file differ, so the trim settings are part of the cache key.
+    trim = trim_settings(args)
+    if trim is None:
+        return MODEL_ID
+    return f"{MODEL_ID}|vad={trim[0]}|windows={trim[1]}x{trim[2]}"
+
+
+class TrimStats:
+    def __init__(self):
+        self.chunks = 0
+        self.decoded = 0
+        self.embedded = 0
+
+    def add(self, decoded, embedded):
+        self.chunks += 1
+        self.decoded += decoded
+        self.embedded += embedded
+
+    def report(self, trim):
+        return {
+            "vad_db": trim[0] if trim else None,
+            "max_windows": trim[1] if trim else None,
+            "window_sec": trim[2] if trim and trim[1] else None,
+            "measured_chunks": self.chunks,
+            "decoded_sec": round(self.decoded / SAMPLE_RATE, 3),
+            "embedded_sec": round(self.embedded / SAMPLE_RATE, 3),
+            "skipped_sec": round((self.decoded - self.embedded) / SAMPLE_RATE, 3),
+            "skipped_ratio": round(1 - self.embedded / self.decoded, 4) if self.decoded else 0.0,
+        }
+
+
+def wav_layout(audio_path):
+    # (offset, frames, channels, rate, dtype, scale) for PCM16/PCM32/float32 WAV, else None.
+    try:
+        with open(audio_path, 'rb') as f:
+            riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+            if riff != b"RIFF" or wave_id != b"WAVE":
+                return None
+            fmt = None
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    return None
+                chunk_id, size = struct.unpack("<4sI", header)
+                if chunk_id == b"fmt ":
+                    body = f.read(size + (size & 1))
+                    tag, channels, rate, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+                    if tag == 0xFFFE and len(body) >= 26:
+                        tag = struct.unpack("<H", body[24:26])[0]
+                    fmt = (tag, channels, rate, bits)
+                elif chunk_id == b"data":
+                    if fmt is None:
+                        return None
+                    offset = f.tell()
+                    break
+                else:
+                    f.seek(size + (size & 1), os.SEEK_CUR)
+    except (OSError, struct.error):
+        return None
+    tag, channels, rate, bits = fmt
+    dtype, scale = {(1, 16): ("<i2", 1 / 32768), (1, 32): ("<i4", 1 / 2147483648), (3, 32): ("<f4", 1.0)}.get((tag, bits), (None, None))
+    if dtype is None or channels < 1:
+        return None
+    # Streamed writers leave the data size at 0 or 0xFFFFFFFF; the file length is the authority.
+    size = min(size, os.path.getsize(audio_path) - offset) if size else os.path.getsize(audio_path) - offset
+    frames = size // (np.dtype(dtype).itemsize * channels)
+    return offset, frames, channels, rate, dtype, scale
+
+
+class MasterAudio:
+    # A 16kHz PCM WAV master is memory-mapped as is; anything else is decoded once into memory.
+    # Either way segments are sliced out of the one signal, never decoded per segment.
+    def __init__(self, audio_path):
+        self.path = audio_path
+        layout = wav_layout(audio_path)
+        if layout is not None and layout[3] == SAMPLE_RATE:
+            offset, frames, channels, _, dtype, self.scale = layout
+            self.samples = np.memmap(audio_path, dtype=dtype, mode="r", offset=offset, shape=(frames, channels))
+            self.mapped = True
+        else:
+            self.samples = decode_audio(audio_path)[:, None]
+            self.scale = 1.0
+            self.mapped = False
+
+    @property
+    def duration(self):
+        return len(self.samples) / SAMPLE_RATE
+
+    def bounds(self, start, end):
+        return max(0, int(round(start * SAMPLE_RATE))), min(len(self.samples), int(round(end * SAMPLE_RATE)))
+
+    def window(self, first, last):
+        # Only this segment's pages are touched; the float32 copy is what the encoder batches.
+        block = self.samples[first:last]
+        signal = block.mean(axis=1, dtype=np.float32) if block.shape[1] > 1 else block[:, 0]
+        signal = np.asarray(signal, dtype=np.float32)
+        return signal * np.float32(self.scale) if self.scale != 1.0 else np.ascontiguousarray(signal)
+
+
+def make_decode_pool(workers):
+    if workers == 0:
+        return None
+    # spawn, not fork: the parent may already hold torch's thread pools.
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def iter_decoded(paths, session, prefetch, decode=decode_audio):
+    # Yields (position, decode(path), error); never more than `prefetch` decodes in flight. Order is input order
+    # unless a decode child dies: the pool is rebuilt and the files that were in flight are retried one at a time,
+    # so only the file that kills a worker again is reported as failed.
+    if session.pool is None:
+        for position, audio_path in enumerate(paths):
+            try:
+                yield position, decode(audio_path), None
+            except Exception as e:
+                yield position, None, e
+        return
+    queued = deque(enumerate(paths))
+    suspects = deque()
+    inflight = deque()
+
+    def submit(position, audio_path, isolated):
+        try:
+            future = session.pool.submit(decode, audio_path)
+        except BrokenProcessPool:
+            session.restart_pool()
+            future = session.pool.submit(decode, audio_path)
+        inflight.append((position, audio_path, future, isolated))
+
+    while queued or suspects or inflight:
+        if suspects:
+            if not inflight:
+                submit(*suspects.popleft(), True)
+        else:
+            while queued and len(inflight) < prefetch:
+                submit(*queued.popleft(), False)
+        position, audio_path, future, isolated = inflight.popleft()
         try:
-            # Load with librosa, resample to 16kHz
-            signal, fs = librosa.load(audio_path, sr=16000)
-            # Convert to torch tensor
-            signal = torch.from_numpy(signal).unsqueeze(0)
-            
-            embeddings = classifier.encode_batch(signal)
-            embedding = embeddings.squeeze().detach().cpu().numpy()
-            
-            if speaker not in speaker_embeddings:
-                speaker_embeddings[speaker] = []
-            speaker_embeddings[speaker].append(embedding)
+            result = future.result()
+        except BrokenProcessPool as e:
+            session.restart_pool()
+            if isolated:
+                yield position, None, e
+            else:
+                suspects.append((position, audio_path))
+                suspects.extend((p, path) for p, path, _, _ in inflight)
+                inflight.clear()
+            continue
         except Exception as e:
-            print(f"DEBUG: Error processing {audio_path}: {str(e)}", file=sys.stderr)
+            yield position, None, e
+            continue
+        yield position, result, None
+
+
+def length_buckets(signals, batch_size):
+    # Sorting by length keeps padding inside each batch to the gap between neighbours.
+    ordered = sorted(signals, key=lambda item: len(item[1]))
+    for start in range(0, len(ordered), batch_size):
+        yield ordered[start:start + batch_size]
+
+
+def load_classifier():
+    from speechbrain.inference.speaker import EncoderClassifier
+    return EncoderClassifier.from_hparams(source=MODEL_ID)
+
+
+class EncoderSession:
+    # Owns the expensive state (model, decode pool) so a resident worker pays for it once.
+    def __init__(self, decode_workers, loader=load_classifier):
+        self.loader = loader
+        self.classifier = None
+        self.model_load_sec = 0.0
+        self.decode_workers = decode_workers
+        self.pool = make_decode_pool(decode_workers)
+        self.pool_restarts = 0
+        self.centroid_stores = {}
+
+    def get_classifier(self):
+        if self.classifier is None:
+            t0 = time.perf_counter()
+            self.classifier = self.loader()
+            self.model_load_sec = time.perf_counter() - t0
+        return self.classifier
+
+    def restart_pool(self):
+        # A decode child died (OOM, a crash on corrupt audio): the executor is unusable from then on, so a
+        # resident worker replaces it instead of failing every later request.
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.pool = make_decode_pool(self.decode_workers)
+        self.pool_restarts += 1
+
+    def centroid_store(self, path):
+        # Loaded once per session; a resident worker answers history queries from memory and only re-reads
+        # the table when its row count or highest id has moved since the last load or own write.
+        if path not in self.centroid_stores:
+            self.centroid_stores[path] = CentroidStore(path)
+        else:
+            self.centroid_stores[path].refresh()
+        return self.centroid_stores[path]
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+        for store in self.centroid_stores.values():
+            store.close()
+
+
+def encode_bucket(classifier, bucket):
+    import torch
+    lengths = [len(signal) for _, signal in bucket]
+    max_len = max(lengths)
+    batch = np.zeros((len(bucket), max_len), dtype=np.float32)
+    for row, (_, signal) in enumerate(bucket):
+        batch[row, :len(signal)] = signal
+    # Relative lengths let ECAPA's statistics pooling ignore the zero padding.
+    wav_lens = torch.tensor([length / max_len for length in lengths], dtype=torch.float32)
+    embeddings = classifier.encode_batch(torch.from_numpy(batch), wav_lens)
+    return embeddings.squeeze(1).detach().cpu().numpy()
+
+
+class SpeakerAccumulator:
+    # Welford mean/variance per speaker in preallocated rows: O(speakers x dim) memory, flat in chunk count.
+    # Batch and follow mode both score through this, so they agree.
+    def __init__(self, capacity=8):
+        self.speakers = []
+        self.index = {}
+        self.counts = np.zeros(capacity, dtype=np.int64)
+        self.means = None
+        self.m2 = None
+
+    def _row(self, speaker, dim):
+        i = self.index.get(speaker)
+        if i is not None:
+            return i
+        i = self.index[speaker] = len(self.speakers)
+        self.speakers.append(speaker)
+        if self.means is None:
+            self.means = np.zeros((len(self.counts), dim), dtype=np.float64)
+            self.m2 = np.zeros((len(self.counts), dim), dtype=np.float64)
+        if i == len(self.counts):
+            self.counts = np.concatenate([self.counts, np.zeros_like(self.counts)])
+            self.means = np.concatenate([self.means, np.zeros_like(self.means)])
+            self.m2 = np.concatenate([self.m2, np.zeros_like(self.m2)])
+        return i
+
+    def add(self, speaker, embedding):
+        i = self._row(speaker, len(embedding))
+        self.counts[i] += 1
+        delta = embedding - self.means[i]
+        self.means[i] += delta / self.counts[i]
+        self.m2[i] += delta * (embedding - self.means[i])
+        return i
+
+    def centroids(self):
+        if not self.speakers:
+            return np.zeros((0, 0), dtype=np.float64)
+        return self.means[:len(self.speakers)].copy()
+
+    def dispersion(self):
+        report = {}
+        for i, speaker in enumerate(self.speakers):
+            variance = self.m2[i] / self.counts[i]
+            report[speaker] = {
+                "chunks": int(self.counts[i]),
+                "total_std": float(np.sqrt(variance.sum())),
+                "mean_dim_std": float(np.sqrt(variance).mean()),
+                "relative_spread": float(np.sqrt(variance.sum()) / max(np.linalg.norm(self.means[i]), 1e-12)),
+            }
+        return report
+
+    def collisions_with(self, i, threshold, min_chunks):
+        centroids = self.centroids()
+        row = unit_rows(centroids) @ unit_rows(centroids[i:i + 1])[0]
+        pairs = []
+        for j in np.nonzero(row > threshold)[0].tolist():
+            if j == i or min(self.counts[i], self.counts[j]) < min_chunks:
+                continue
+            a, b = min(i, j), max(i, j)
+            pairs.append({"speakers": [self.speakers[a], self.speakers[b]], "similarity": float(row[j]), "type": "VOICE_COLLAPSE"})
+        return pairs
+
+
+def score_speakers(accumulator, threshold):
+    speakers = accumulator.speakers
+    centroids = accumulator.centroids()
+    similarity = speaker_similarity(centroids)
+    distance_matrix = {s1: {s2: float(similarity[i, j]) for j, s2 in enumerate(speakers)} for i, s1 in enumerate(speakers)}
+    return centroids, distance_matrix, find_collisions(speakers, similarity, threshold)
+
+
+def unit_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def speaker_similarity(centroids):
+    unit = unit_rows(centroids)
+    return unit @ unit.T
+
+
+def find_collisions(speakers, similarity, threshold):
+    # np.nonzero walks row-major, so pairs come out in the same (i < j) order as a nested loop.
+    rows, cols = np.nonzero(np.triu(similarity > threshold, k=1))
+    return [
+        {"speakers": [speakers[i], speakers[j]], "similarity": float(similarity[i, j]), "type": "VOICE_COLLAPSE"}
+        for i, j in zip(rows.tolist(), cols.tolist())
+    ]
+
+
+def chunk_drift(chunk_matrix, chunk_speaker_ids, audio_paths, centroids, speakers, top_k, margin, block_size=4096):
+    # Chunks are scored against S centroids in fixed-size blocks: memory is block_size x S, never N x N.
+    unit_centroids = unit_rows(centroids)
+    k = min(top_k, len(speakers))
+    flagged = []
+    for start in range(0, len(chunk_matrix), block_size):
+        sims = unit_rows(chunk_matrix[start:start + block_size]) @ unit_centroids.T
+        rows = np.arange(len(sims))
+        own_ids = chunk_speaker_ids[start:start + block_size]
+        own = sims[rows, own_ids]
+        others = sims.copy()
+        others[rows, own_ids] = -np.inf
+        if len(speakers) < 2:
+            break
+        drifting = np.nonzero(others.max(axis=1) >= own - margin)[0]
+        if len(drifting) == 0:
             continue
+        top = np.argpartition(-sims[drifting], k - 1, axis=1)[:, :k]
+        top_sims = np.take_along_axis(sims[drifting], top, axis=1)
+        order = np.argsort(-top_sims, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_sims = np.take_along_axis(top_sims, order, axis=1)
+        for n, row in enumerate(drifting.tolist()):
+            flagged.append({
+                "audio_path": audio_paths[start + row],
+                "speaker": speakers[own_ids[row]],
+                "own_similarity": float(own[row]),
+                "nearest": [{"speaker": speakers[j], "similarity": float(sim)} for j, sim in zip(top[n].tolist(), top_sims[n].tolist())],
+                "type": "VOICE_DRIFT",
+            })
+    return {"top_k": k, "margin": margin, "checked_chunks": len(chunk_matrix), "flagged": flagged}
+
+
+def attribute_segments(segment_matrix, centroids, speakers, min_similarity, top_k):
+    # Nearest centroid per segment; margin is the lead over the runner-up, None with a single known speaker.
+    sims = unit_rows(segment_matrix) @ unit_rows(centroids).T
+    order = np.argsort(-sims, axis=1)[:, :min(max(top_k, 2), len(speakers))]
+    ranked = np.take_along_axis(sims, order, axis=1)
+    rows = []
+    for ids, values in zip(order.tolist(), ranked.tolist()):
+        best = values[0]
+        rows.append({
+            "speaker": speakers[ids[0]] if best >= min_similarity else None,
+            "similarity": float(best),
+            "margin": float(best - values[1]) if len(values) > 1 else None,
+            "nearest": [{"speaker": speakers[j], "similarity": float(sim)} for j, sim in zip(ids[:top_k], values[:top_k])],
+        })
+    return rows
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("manifest", nargs="?")
+    parser.add_argument("--threshold", type=float, default=COLLAPSE_THRESHOLD, help="centroid cosine similarity above which two speakers have collapsed")
+    parser.add_argument("--cache-path", default=os.environ.get("YT3_VOICE_EMBEDDING_CACHE", DEFAULT_CACHE_PATH))
+    parser.add_argument("--cache-max-mb", type=float, default=64.0)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument(
+        "--decode-workers", type=int, default=max(1, min(4, (os.cpu_count() or 2) - 1)),
+        help="decode processes; 0 decodes in-process without a pool",
+    )
+    parser.add_argument("--prefetch", type=int, default=16)
+    parser.add_argument("--bucket-window", type=int, default=4)
+    parser.add_argument("--vad-db", type=float, metavar="DB", help="trim frames quieter than DB (e.g. -35) relative to the chunk's loudest frame before embedding")
+    parser.add_argument("--max-windows", type=int, metavar="N", help="embed at most N evenly spaced --window-sec windows of each (trimmed) chunk")
+    parser.add_argument("--window-sec", type=float, default=3.0)
+    parser.add_argument("--parity", action="store_true", help="audit with and without --vad-db/--max-windows and compare collision verdicts")
+    parser.add_argument("--chunk-drift", action="store_true", help="flag chunks that sit as close to another speaker's centroid as to their own")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--drift-margin", type=float, default=0.0)
+    parser.add_argument("--follow", metavar="SOURCE", help="audit chunks as they land: a growing manifest.json, or - for JSON-lines chunk events on stdin")
+    parser.add_argument("--min-chunks", type=int, default=2, help="with --follow, chunks per speaker before a collapse is signalled")
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--idle-timeout", type=float, default=600.0)
+    parser.add_argument("--exit-on-collapse", action="store_true", help="with --follow, stop with exit code 3 at the first VOICE_COLLAPSE")
+    parser.add_argument("--serve", action="store_true", help="keep the model resident and answer JSON-lines requests")
+    parser.add_argument("--socket", help="with --serve, listen on this Unix socket instead of stdin/stdout")
+    parser.add_argument("--latency-report", type=int, metavar="N", help="audit the manifest once cold and N times warm")
+    parser.add_argument("--bulk", nargs="+", metavar="MANIFEST_OR_GLOB", help="audit many manifests with one model and decode pool, one JSON line per run")
+    parser.add_argument("--bulk-from", metavar="FILE", help="with --bulk, also read manifest paths from FILE, one per line (- for stdin)")
+    parser.add_argument("--resume-log", metavar="JSONL", help="with --bulk, append each run's line here and skip runs already recorded as successful")
+    parser.add_argument("--run-id", help="store this run's speaker centroids in the evolution DB and report the nearest earlier voices")
+    parser.add_argument("--channel", help="with --run-id, the channel (bucket) the run belongs to")
+    parser.add_argument("--evolution-db", default=os.environ.get("YT3_EVOLUTION_DB", DEFAULT_EVOLUTION_DB))
+    parser.add_argument("--history-k", type=int, default=5, help="with --run-id, nearest stored voices reported per speaker")
+    parser.add_argument("--segments", metavar="ASR_JSONL", help="attribute each asr_raw.jsonl segment of --master to a known speaker")
+    parser.add_argument("--master", metavar="AUDIO", help="with --segments, the long-form mastered audio the timings refer to")
+    parser.add_argument("--reference", action="append", default=[], metavar="MANIFEST", help="with --segments, a TTS manifest whose speakers are the known voices (repeatable)")
+    parser.add_argument("--reference-run", action="append", default=[], metavar="RUN_ID", help="with --segments, take known voices from centroids stored for this run (repeatable)")
+    parser.add_argument("--min-segment-sec", type=float, default=0.5, help="with --segments, shorter segments are skipped")
+    parser.add_argument("--min-similarity", type=float, default=0.0, help="with --segments, below this a segment stays unattributed")
+    args = parser.parse_args(argv)
+    if args.batch_size < 1 or args.prefetch < 1 or args.bucket_window < 1 or args.top_k < 1 or args.history_k < 1:
+        parser.error("--batch-size, --prefetch, --bucket-window, --top-k and --history-k must be >= 1")
+    if args.decode_workers < 0:
+        parser.error("--decode-workers must be >= 1, or 0 to decode in-process")
+    if args.segments and (not args.master or not (args.reference or args.reference_run)):
+        parser.error("--segments needs --master and at least one --reference manifest or --reference-run")
+    if args.vad_db is not None and args.vad_db >= 0:
+        parser.error("--vad-db is a negative level below the loudest frame, e.g. -35")
+    if (args.max_windows is not None and args.max_windows < 1) or args.window_sec <= 0:
+        parser.error("--max-windows must be >= 1 and --window-sec > 0")
+    if args.parity and trim_settings(args) is None:
+        parser.error("--parity compares against trimming: give --vad-db and/or --max-windows")
+    if args.bulk_from and args.bulk is None:
+        args.bulk = []
+    if args.bulk is not None and args.run_id:
+        parser.error("--run-id names a single run and cannot be combined with --bulk")
+    if not args.serve and not args.follow and not args.segments and args.bulk is None and not args.manifest:
+        parser.error("manifest is required unless --serve, --follow, --segments or --bulk is given")
+    return args
+
+
+def run_audit(manifest_path, args, session, accumulator=None):
+    audio_dir = os.path.dirname(manifest_path)
+    timings = {"hash": 0.0, "model_load": 0.0, "decode_wait": 0.0, "embed": 0.0, "accumulate": 0.0, "score": 0.0}
+    started = time.perf_counter()
+
+    with open(manifest_path, 'r') as f:
+        manifest = json.load(f)
+
+    cache = None if args.no_cache else EmbeddingCache(args.cache_path, int(args.cache_max_mb * 1024 * 1024))
+    chunks = collect_chunks(manifest, audio_dir)
+    trim = trim_settings(args)
+    trim_stats = TrimStats()
+    variant = embedding_variant(args)
+    keys = [None] * len(chunks)
+    # Per-slot state instead of per-slot arrays: embeddings are folded into the accumulator and dropped.
+    state = bytearray(len(chunks))
+    chunk_metrics = [None] * len(chunks)
+
+    t0 = time.perf_counter()
+    for slot, (_, audio_path) in enumerate(chunks if cache else []):
+        keys[slot] = (file_sha256(audio_path), variant, SAMPLE_RATE)
+        if cache.has_chunk(keys[slot]):
+            state[slot] = SLOT_CACHED
+    timings["hash"] = time.perf_counter() - t0
+
+    # A caller-supplied accumulator collects centroids across several manifests (see run_segments).
+    accumulator = SpeakerAccumulator() if accumulator is None else accumulator
+    drift_rows = []
+    chunk_matrix = None
+    chunk_speaker_ids = np.zeros(len(chunks) if args.chunk_drift else 0, dtype=np.int64)
+    ready = {}
+    next_slot = 0
+    peak_ready = 0
+
+    def drain():
+        # Fold embeddings in manifest order so sums, speaker order and reports are identical run to run.
+        nonlocal next_slot, chunk_matrix
+        t0 = time.perf_counter()
+        while next_slot < len(chunks):
+            if state[next_slot] == SLOT_FAILED:
+                next_slot += 1
+                continue
+            if state[next_slot] == SLOT_CACHED:
+                embedding = cache.read(keys[next_slot])
+                chunk_metrics[next_slot] = cache.read_metrics(keys[next_slot][0])
+            elif next_slot in ready:
+                embedding = ready.pop(next_slot)
+            else:
+                break
+            speaker, audio_path = chunks[next_slot]
+            i = accumulator.add(speaker, embedding)
+            if args.chunk_drift:
+                if chunk_matrix is None:
+                    chunk_matrix = np.empty((len(chunks), len(embedding)), dtype=np.float32)
+                chunk_matrix[len(drift_rows)] = embedding
+                chunk_speaker_ids[len(drift_rows)] = i
+                drift_rows.append(audio_path)
+            next_slot += 1
+        timings["accumulate"] += time.perf_counter() - t0
+
+    pending = [slot for slot in range(len(chunks)) if state[slot] != SLOT_CACHED]
+    batches = 0
+    peak_buffered = 0
+    if pending:
+        t0 = time.perf_counter()
+        classifier = session.get_classifier()
+        timings["model_load"] = time.perf_counter() - t0
 
-    speakers = list(speaker_embeddings.keys())
-    centroids = {spk: np.mean(speaker_embeddings[spk], axis=0) for spk in speakers}
-
-    def cosine_similarity(a, b):
-        return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
-
-    distance_matrix = {}
-    collisions = []
-    
-    for i in range(len(speakers)):
-        s1 = speakers[i]
-        distance_matrix[s1] = {}
-        for j in range(len(speakers)):
-            s2 = speakers[j]
-            sim = float(cosine_similarity(centroids[s1], centroids[s2]))
-            distance_matrix[s1][s2] = sim
-            if i < j and sim > 0.85:
-                collisions.append({"speakers": [s1, s2], "similarity": sim, "type": "VOICE_COLLAPSE"})
-
-    print(json.dumps({
+        def flush(window):
+            nonlocal batches, peak_ready
+            t0 = time.perf_counter()
+            for bucket in length_buckets(window, args.batch_size):
+                batches += 1
+                try:
+                    vectors = encode_bucket(classifier, bucket)
+                except Exception as e:
+                    for slot, _ in bucket:
+                        print(f"DEBUG: Error processing {chunks[slot][1]}: {str(e)}", file=sys.stderr)
+                        state[slot] = SLOT_FAILED
+                    continue
+                for (slot, _), embedding in zip(bucket, vectors):
+                    ready[slot] = embedding
+                    if cache:
+                        cache.put(keys[slot], embedding)
+            timings["embed"] += time.perf_counter() - t0
+            peak_ready = max(peak_ready, len(ready))
+            drain()
+
+        # Decoded audio held at once is capped at prefetch + window signals, whatever the manifest size.
+        window_size = args.batch_size * args.bucket_window
+        window = []
+        decode = functools.partial(decode_for_embedding, trim=trim)
+        decoded = iter_decoded([chunks[slot][1] for slot in pending], session, args.prefetch, decode)
+        while True:
+            t0 = time.perf_counter()
+            item = next(decoded, None)
+            timings["decode_wait"] += time.perf_counter() - t0
+            if item is None:
+                break
+            position, prepared, error = item
+            slot = pending[position]
+            if error is not None:
+                print(f"DEBUG: Error processing {chunks[slot][1]}: {str(error)}", file=sys.stderr)
+                state[slot] = SLOT_FAILED
+                continue
+            signal, decoded_len, chunk_metrics[slot] = prepared
+            if cache:
+                cache.put_metrics(keys[slot][0], chunk_metrics[slot])
+            trim_stats.add(decoded_len, len(signal))
+            window.append((slot, signal))
+            peak_buffered = max(peak_buffered, len(window))
+            if len(window) >= window_size:
+                flush(window)
+                window = []
+        if window:
+            flush(window)
+    drain()
+
+    if cache:
+        cache.close()
+
+    t0 = time.perf_counter()
+    speakers = accumulator.speakers
+    centroids, distance_matrix, collisions = score_speakers(accumulator, args.threshold)
+    drift = None
+    if args.chunk_drift and drift_rows:
+        n = len(drift_rows)
+        drift = chunk_drift(
+            chunk_matrix[:n], chunk_speaker_ids[:n], drift_rows,
+            centroids, speakers, args.top_k, args.drift_margin,
+        )
+    signal_summary = signal_report([(*chunks[slot], metrics) for slot, metrics in enumerate(chunk_metrics) if metrics is not None])
+    timings["score"] = time.perf_counter() - t0
+
+    history = None
+    if args.run_id:
+        t0 = time.perf_counter()
+        store = session.centroid_store(args.evolution_db)
+        history = voice_history(store, args.run_id, args.channel, speakers, centroids, accumulator.counts[:len(speakers)], args.history_k)
+        timings["history"] = time.perf_counter() - t0
+    timings["total"] = time.perf_counter() - started
+
+    return {
         "status": "success",
         "speakers": speakers,
+        "threshold": args.threshold,
         "distance_matrix": distance_matrix,
         "collisions": collisions,
+        "dispersion": accumulator.dispersion(),
+        "chunk_drift": drift,
+        "voice_history": history,
+        "trim": trim_stats.report(trim),
+        "signal": signal_summary,
+        "cache": cache.stats() if cache else {"enabled": False},
+        "batching": {"batch_size": args.batch_size, "batches": batches, "embedded_chunks": len(pending)},
+        "pipeline": {
+            "decode_workers": session.decode_workers,
+            "decode_pool_restarts": session.pool_restarts,
+            "prefetch": args.prefetch,
+            "bucket_window": args.bucket_window,
+            "peak_buffered_signals": peak_buffered,
+            "peak_pending_embeddings": peak_ready,
+        },
+        "timings": {stage: round(seconds, 4) for stage, seconds in timings.items()},
         "summary": {"total_speakers": len(speakers), "detected_collisions": len(collisions)}
-    }))
+    }
+
+
+def collision_pairs(report):
+    return sorted(tuple(collision["speakers"]) for collision in report["collisions"])
+
+
+def run_parity(manifest_path, args, session):
+    # The manifest is audited untrimmed and trimmed; trimming is safe to enable when the collision verdicts agree.
+    baseline = run_audit(manifest_path, argparse.Namespace(**{**vars(args), "vad_db": None, "max_windows": None, "run_id": None}), session)
+    trimmed = run_audit(manifest_path, argparse.Namespace(**{**vars(args), "run_id": None}), session)
+    deltas = [
+        abs(row[other] - baseline["distance_matrix"][speaker][other])
+        for speaker, row in trimmed["distance_matrix"].items()
+        for other in row
+        if speaker in baseline["distance_matrix"] and other in baseline["distance_matrix"][speaker]
+    ]
+    trimmed["parity"] = {
+        "collisions_match": collision_pairs(baseline) == collision_pairs(trimmed),
+        "baseline_collisions": [list(pair) for pair in collision_pairs(baseline)],
+        "trimmed_collisions": [list(pair) for pair in collision_pairs(trimmed)],
+        "max_similarity_delta": round(max(deltas), 6) if deltas else 0.0,
+        "baseline_embed_sec": baseline["timings"]["embed"],
+        "trimmed_embed_sec": trimmed["timings"]["embed"],
+    }
+    return trimmed
+
+
+def load_segments(segments_path):
+    segments = []
+    with open(segments_path, 'r') as f:
+        for line in f:
+            if line.strip():
+                segment = json.loads(line)
+                segments.append({"start": float(segment["start"]), "end": float(segment["end"]), "text": segment.get("text", "")})
+    return segments
+
+
+def run_segments(args, session):
+    timings = {"reference": 0.0, "hash": 0.0, "master_open": 0.0, "model_load": 0.0, "slice": 0.0, "embed": 0.0, "score": 0.0}
+    started = time.perf_counter()
+
+    # Known voices come from ordinary manifest audits (their embeddings are usually already cached) and from
+    # centroids stored for earlier runs. A speaker named in several sources is pooled, weighted by chunk count.
+    t0 = time.perf_counter()
+    accumulator = SpeakerAccumulator()
+    for manifest_path in args.reference:
+        run_audit(manifest_path, argparse.Namespace(**{**vars(args), "run_id": None}), session, accumulator)
+    sums = {speaker: accumulator.means[i] * accumulator.counts[i] for i, speaker in enumerate(accumulator.speakers)}
+    weights = {speaker: int(accumulator.counts[i]) for i, speaker in enumerate(accumulator.speakers)}
+    if args.reference_run:
+        store = session.centroid_store(args.evolution_db)
+        for run_id in args.reference_run:
+            found = [label for label in store.labels if label[0] == run_id]
+            if not found:
+                raise ValueError(f"no stored centroids for run {run_id} in {args.evolution_db}")
+            for (_, _, speaker, count), centroid in zip(found, store.centroids(run_id)[1]):
+                sums[speaker] = sums.get(speaker, 0) + centroid * count
+                weights[speaker] = weights.get(speaker, 0) + count
+    speakers = list(sums)
+    centroids = np.array([sums[speaker] / max(weights[speaker], 1) for speaker in speakers])
+    timings["reference"] = time.perf_counter() - t0
+    if not speakers:
+        raise ValueError("reference manifests yielded no speakers")
+
+    segments = load_segments(args.segments)
+    cache = None if args.no_cache else EmbeddingCache(args.cache_path, int(args.cache_max_mb * 1024 * 1024))
+    t0 = time.perf_counter()
+    master_sha = file_sha256(args.master) if cache else None
+    timings["hash"] = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    master = MasterAudio(args.master)
+    timings["master_open"] = time.perf_counter() - t0
+
+    skipped = []
+    windows = []
+    for index, segment in enumerate(segments):
+        first, last = master.bounds(segment["start"], segment["end"])
+        if last <= first:
+            skipped.append({"index": index, "start": segment["start"], "end": segment["end"], "reason": "outside master"})
+        elif (last - first) / SAMPLE_RATE < args.min_segment_sec:
+            skipped.append({"index": index, "start": segment["start"], "end": segment["end"], "reason": "shorter than --min-segment-sec"})
+        else:
+            windows.append((index, first, last))
+
+    # Segment embeddings are cached under the master's content hash plus the sample window.
+    embeddings = {}
+    trim = trim_settings(args)
+    trim_stats = TrimStats()
+    variant = embedding_variant(args)
+    keys = {index: (f"{master_sha}:{first}:{last}", variant, SAMPLE_RATE) for index, first, last in windows} if cache else {}
+    pending = []
+    for index, first, last in windows:
+        embedding = cache.get(keys[index]) if cache else None
+        if embedding is None:
+            pending.append((index, first, last))
+        else:
+            embeddings[index] = embedding
+
+    batches = 0
+    if pending:
+        t0 = time.perf_counter()
+        classifier = session.get_classifier()
+        timings["model_load"] = time.perf_counter() - t0
+        window_size = args.batch_size * args.bucket_window
+        for start in range(0, len(pending), window_size):
+            t0 = time.perf_counter()
+            window = []
+            for index, first, last in pending[start:start + window_size]:
+                signal = master.window(first, last)
+                trimmed = trim_for_embedding(signal, *trim) if trim else signal
+                trim_stats.add(len(signal), len(trimmed))
+                window.append((index, trimmed))
+            timings["slice"] += time.perf_counter() - t0
+            t0 = time.perf_counter()
+            for bucket in length_buckets(window, args.batch_size):
+                batches += 1
+                try:
+                    vectors = encode_bucket(classifier, bucket)
+                except Exception as e:
+                    for index, _ in bucket:
+                        print(f"DEBUG: Error processing segment {index} of {args.master}: {str(e)}", file=sys.stderr)
+                        skipped.append({"index": index, "start": segments[index]["start"], "end": segments[index]["end"], "reason": f"embed failed: {e}"})
+                    continue
+                for (index, _), embedding in zip(bucket, vectors):
+                    embeddings[index] = embedding
+                    if cache:
+                        cache.put(keys[index], embedding)
+            timings["embed"] += time.perf_counter() - t0
+
+    if cache:
+        cache.close()
+
+    t0 = time.perf_counter()
+    attributed = sorted(embeddings)
+    rows = []
+    speaker_seconds = {speaker: 0.0 for speaker in speakers}
+    if attributed:
+        matrix = np.stack([embeddings[index] for index in attributed])
+        for index, row in zip(attributed, attribute_segments(matrix, centroids, speakers, args.min_similarity, args.top_k)):
+            segment = segments[index]
+            rows.append({"index": index, "start": segment["start"], "end": segment["end"], **row, "text": segment["text"]})
+            if row["speaker"] is not None:
+                speaker_seconds[row["speaker"]] += segment["end"] - segment["start"]
+    timings["score"] = time.perf_counter() - t0
+    timings["total"] = time.perf_counter() - started
+
+    unattributed = sum(1 for row in rows if row["speaker"] is None)
+    return {
+        "status": "success",
+        "mode": "segments",
+        "master": {"path": args.master, "memory_mapped": master.mapped, "duration_sec": round(master.duration, 3)},
+        "segments_path": args.segments,
+        "reference": {"manifests": args.reference, "runs": args.reference_run},
+        "speakers": speakers,
+        "min_similarity": args.min_similarity,
+        "segments": rows,
+        "skipped": sorted(skipped, key=lambda item: item["index"]),
+        "speaker_seconds": {speaker: round(seconds, 3) for speaker, seconds in speaker_seconds.items()},
+        "trim": trim_stats.report(trim),
+        "cache": cache.stats() if cache else {"enabled": False},
+        "batching": {"batch_size": args.batch_size, "batches": batches, "embedded_segments": len(pending)},
+        "timings": {stage: round(seconds, 4) for stage, seconds in timings.items()},
+        "summary": {
+            "total_segments": len(segments),
+            "attributed": len(rows) - unattributed,
+            "unattributed": unattributed,
+            "skipped": len(skipped),
+        },
+    }
+
+
+def embed_chunk(audio_path, cache, session, args, trim_stats):
+    key = (file_sha256(audio_path), embedding_variant(args), SAMPLE_RATE)
+    if cache and cache.has_chunk(key):
+        return cache.read(key), cache.read_metrics(key[0])
+    signal, decoded_len, metrics = decode_for_embedding(audio_path, trim_settings(args))
+    trim_stats.add(decoded_len, len(signal))
+    embedding = encode_bucket(session.get_classifier(), [(0, signal)])[0]
+    if cache:
+        cache.put(key, embedding)
+        cache.put_metrics(key[0], metrics)
+    return embedding, metrics
+
+
+def iter_event_chunks(stream):
+    # One manifest chunk object per line; {"event": "end"} or EOF closes the stream.
+    for line in stream:
+        if not line.strip():
+            continue
+        event = json.loads(line)
+        if event.get("event") == "end":
+            return
+        target = chunk_target(event, os.getcwd())
+        if target is None:
+            print(f"DEBUG: Skipping chunk event without speaker or audio: {line.strip()}", file=sys.stderr)
+            continue
+        yield target
+
+
+def iter_manifest_chunks(manifest_path, poll_interval, idle_timeout):
+    # Re-reads the manifest as it grows; ends at total_chunks or after idle_timeout without new chunks.
+    audio_dir = os.path.dirname(manifest_path)
+    seen = set()
+    last_mtime = None
+    last_progress = time.monotonic()
+    while True:
+        mtime = os.stat(manifest_path).st_mtime_ns if os.path.exists(manifest_path) else None
+        total = None
+        if mtime is not None and mtime != last_mtime:
+            try:
+                with open(manifest_path, 'r') as f:
+                    manifest = json.load(f)
+            except json.JSONDecodeError:
+                manifest = None
+            if manifest is not None:
+                last_mtime = mtime
+                total = manifest.get("total_chunks")
+                for speaker, audio_path in collect_chunks(manifest, audio_dir):
+                    if audio_path in seen:
+                        continue
+                    seen.add(audio_path)
+                    last_progress = time.monotonic()
+                    yield speaker, audio_path
+        if total is not None and len(seen) >= total:
+            return
+        if time.monotonic() - last_progress > idle_timeout:
+            return
+        time.sleep(poll_interval)
+
+
+def emit(record):
+    print(json.dumps(record), flush=True)
+
+
+def run_follow(args, session):
+    started = time.perf_counter()
+    cache = None if args.no_cache else EmbeddingCache(args.cache_path, int(args.cache_max_mb * 1024 * 1024))
+    source = (
+        iter_event_chunks(sys.stdin)
+        if args.follow == "-"
+        else iter_manifest_chunks(args.follow, args.poll_interval, args.idle_timeout)
+    )
+    accumulator = SpeakerAccumulator()
+    alerted = set()
+    processed = 0
+    trim_stats = TrimStats()
+    measured = []
+    try:
+        for speaker, audio_path in source:
+            try:
+                embedding, metrics = embed_chunk(audio_path, cache, session, args, trim_stats)
+            except Exception as e:
+                print(f"DEBUG: Error processing {audio_path}: {str(e)}", file=sys.stderr)
+                continue
+            measured.append((speaker, audio_path, metrics))
+            i = accumulator.add(speaker, embedding)
+            processed += 1
+            for collision in accumulator.collisions_with(i, args.threshold, args.min_chunks):
+                pair = tuple(collision["speakers"])
+                if pair in alerted:
+                    continue
+                alerted.add(pair)
+                emit({"event": "VOICE_COLLAPSE", **collision, "after_chunks": processed, "chunk": audio_path})
+                if args.exit_on_collapse:
+                    return 3
+    finally:
+        if cache:
+            cache.close()
+
+    _, distance_matrix, collisions = score_speakers(accumulator, args.threshold)
+    emit({
+        "event": "final",
+        "status": "success",
+        "speakers": accumulator.speakers,
+        "threshold": args.threshold,
+        "distance_matrix": distance_matrix,
+        "collisions": collisions,
+        "dispersion": accumulator.dispersion(),
+        "trim": trim_stats.report(trim_settings(args)),
+        "signal": signal_report(measured),
+        "cache": cache.stats() if cache else {"enabled": False},
+        "timings": {"total": round(time.perf_counter() - started, 4)},
+        "summary": {"total_speakers": len(accumulator.speakers), "detected_collisions": len(collisions), "chunks": processed},
+    })
+    return 0
+
+
+def request_args(base, request):
+    args = argparse.Namespace(**vars(base))
+    for option in (
+        "batch_size", "prefetch", "bucket_window", "no_cache", "chunk_drift", "top_k", "drift_margin", "threshold",
+        "vad_db", "max_windows", "window_sec",
+        "segments", "master", "reference", "reference_run", "min_segment_sec", "min_similarity",
+        "run_id", "channel", "history_k",
+    ):
+        if option in request:
+            setattr(args, option, request[option])
+    return args
+
+
+class ForensicWorker:
+    def __init__(self, args):
+        started = time.perf_counter()
+        self.args = args
+        self.session = EncoderSession(args.decode_workers)
+        self.session.get_classifier()
+        self.ready_sec = time.perf_counter() - started
+        self.request_secs = []
+
+    def handle(self, line):
+        t0 = time.perf_counter()
+        try:
+            request = json.loads(line)
+            if request.get("op") == "stats":
+                return self.stats()
+            if request.get("segments"):
+                args = request_args(self.args, request)
+                if not args.master or not (args.reference or args.reference_run):
+                    raise ValueError("segments request needs 'master' and 'reference' or 'reference_run'")
+                report = run_segments(args, self.session)
+            elif not request.get("manifest"):
+                raise ValueError("request is missing 'manifest'")
+            else:
+                report = run_audit(request["manifest"], request_args(self.args, request), self.session)
+        except Exception as e:
+            return {"status": "error", "message": f"{type(e).__name__}: {e}"}
+        self.request_secs.append(time.perf_counter() - t0)
+        report["daemon"] = {
+            "request_index": len(self.request_secs),
+            "request_sec": round(self.request_secs[-1], 4),
+            "model_load_sec": round(self.session.model_load_sec, 4),
+            "ready_sec": round(self.ready_sec, 4),
+        }
+        return report
+
+    def stats(self):
+        secs = self.request_secs
+        return {
+            "status": "success",
+            "requests": len(secs),
+            "model_load_sec": round(self.session.model_load_sec, 4),
+            "ready_sec": round(self.ready_sec, 4),
+            "warm_request_sec": {
+                "mean": round(statistics.fmean(secs), 4) if secs else None,
+                "p50": round(statistics.median(secs), 4) if secs else None,
+                "max": round(max(secs), 4) if secs else None,
+            },
+        }
+
+
+def serve(args):
+    worker = ForensicWorker(args)
+    if not args.socket:
+        try:
+            for line in sys.stdin:
+                if line.strip():
+                    print(json.dumps(worker.handle(line)), flush=True)
+        finally:
+            worker.session.close()
+        return
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if line.strip():
+                    self.wfile.write((json.dumps(worker.handle(line)) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+
+    if os.path.exists(args.socket):
+        os.unlink(args.socket)
+    # Single-threaded on purpose: one resident model, requests are served in arrival order.
+    with socketserver.UnixStreamServer(args.socket, Handler) as server:
+        os.chmod(args.socket, 0o600)
+        print(f"INFO: voice forensic worker ready on {args.socket} ({worker.ready_sec:.2f}s)", file=sys.stderr, flush=True)
+        try:
+            server.serve_forever()
+        finally:
+            worker.session.close()
+            os.unlink(args.socket)
+
+
+def bulk_manifests(patterns, list_path):
+    # Globs are expanded (** recursive) and sorted; plain paths are kept as given. Each manifest runs once.
+    paths = []
+    for pattern in patterns:
+        paths.extend(sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern])
+    if list_path:
+        stream = sys.stdin if list_path == "-" else open(list_path, 'r')
+        try:
+            paths.extend(line.strip() for line in stream if line.strip())
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+    seen = set()
+    unique = []
+    for path in paths:
+        if os.path.abspath(path) not in seen:
+            seen.add(os.path.abspath(path))
+            unique.append(path)
+    return unique
+
+
+def run_content_sha256(manifest_path):
+    # Resume key: the manifest bytes plus every chunk's audio content (the hash the embedding cache is keyed by),
+    # so chunks re-rendered under the same filenames make the run due again.
+    with open(manifest_path, 'rb') as f:
+        raw = f.read()
+    hasher = hashlib.sha256(raw)
+    for _, audio_path in collect_chunks(json.loads(raw), os.path.dirname(manifest_path)):
+        try:
+            digest = file_sha256(audio_path)
+        except FileNotFoundError:
+            digest = "missing"
+        hasher.update(f"\n{audio_path}\0{digest}".encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def completed_runs(log_path):
+    # (manifest, content_sha256, threshold, model_id, parity) of every successful line; a torn last line from an
+    # interrupted run is ignored, so that manifest is audited again. Lines written before content_sha256 existed
+    # never match, so those runs are audited once more.
+    done = set()
+    if not log_path or not os.path.exists(log_path):
+        return done
+    with open(log_path, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("status") == "success":
+                done.add((record["manifest"], record.get("content_sha256"), record["threshold"], record["model_id"], "parity" in record))
+    return done
+
+
+def run_bulk(args, session):
+    # One model and one decode pool for the whole catalog. With a warm embedding cache a threshold change
+    # re-scores every run without loading the model at all.
+    started = time.perf_counter()
+    manifests = bulk_manifests(args.bulk, args.bulk_from)
+    done = completed_runs(args.resume_log)
+    counts = {"audited": 0, "resumed": 0, "errors": 0, "with_collisions": 0, "parity_mismatches": 0}
+    variant = embedding_variant(args)
+    if args.resume_log:
+        os.makedirs(os.path.dirname(os.path.abspath(args.resume_log)), exist_ok=True)
+    log = open(args.resume_log, 'a+') if args.resume_log else None
+    if log and log.tell() > 0:
+        # Terminate a torn line so the next record starts cleanly.
+        log.seek(log.tell() - 1)
+        if log.read(1) != "\n":
+            log.write("\n")
+    try:
+        for manifest_path in manifests:
+            manifest = os.path.abspath(manifest_path)
+            try:
+                manifest_sha = file_sha256(manifest)
+                content_sha = run_content_sha256(manifest)
+            except (OSError, ValueError) as e:
+                manifest_sha = content_sha = None
+                report = {"status": "error", "message": f"{type(e).__name__}: {e}"}
+            else:
+                if (manifest, content_sha, args.threshold, variant, args.parity) in done:
+                    counts["resumed"] += 1
+                    continue
+                try:
+                    report = run_parity(manifest, args, session) if args.parity else run_audit(manifest, args, session)
+                except Exception as e:
+                    report = {"status": "error", "message": f"{type(e).__name__}: {e}"}
+            if report["status"] == "success":
+                counts["audited"] += 1
+                counts["with_collisions"] += bool(report["collisions"])
+                counts["parity_mismatches"] += not report.get("parity", {"collisions_match": True})["collisions_match"]
+            else:
+                counts["errors"] += 1
+            line = json.dumps({
+                "manifest": manifest, "manifest_sha256": manifest_sha, "content_sha256": content_sha,
+                "threshold": args.threshold, "model_id": variant, **report,
+            })
+            print(line, flush=True)
+            if log:
+                log.write(line + "\n")
+                log.flush()
+    finally:
+        if log:
+            log.close()
+    parity = f", {counts['parity_mismatches']} parity mismatches" if args.parity else ""
+    print(
+        f"INFO: bulk audit of {len(manifests)} manifests: {counts['audited']} audited, {counts['resumed']} already done, "
+        f"{counts['errors']} failed, {counts['with_collisions']} with collisions at {args.threshold}{parity}; "
+        f"model load {session.model_load_sec:.2f}s, total {time.perf_counter() - started:.2f}s",
+        file=sys.stderr,
+    )
+    return 1 if counts["errors"] or counts["parity_mismatches"] else 0
+
+
+def latency_report(args):
+    # The cache is bypassed so every pass does the same decode + inference work.
+    args.no_cache = True
+    t0 = time.perf_counter()
+    session = EncoderSession(args.decode_workers)
+    run_audit(args.manifest, args, session)
+    cold = time.perf_counter() - t0
+    warm = []
+    for _ in range(args.latency_report):
+        t0 = time.perf_counter()
+        run_audit(args.manifest, args, session)
+        warm.append(time.perf_counter() - t0)
+    session.close()
+    warm_p50 = statistics.median(warm) if warm else None
+    return {
+        "status": "success",
+        "manifest": args.manifest,
+        "cold_start_sec": round(cold, 4),
+        "model_load_sec": round(session.model_load_sec, 4),
+        "warm_request_sec": [round(sec, 4) for sec in warm],
+        "warm_p50_sec": round(warm_p50, 4) if warm_p50 is not None else None,
+        "cold_to_warm_ratio": round(cold / warm_p50, 2) if warm_p50 else None,
+    }
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    if args.serve:
+        serve(args)
+        return
+    if args.follow:
+        session = EncoderSession(0)
+        try:
+            raise SystemExit(run_follow(args, session))
+        finally:
+            session.close()
+    if args.latency_report is not None:
+        print(json.dumps(latency_report(args)))
+        return
+    if args.bulk is not None:
+        session = EncoderSession(args.decode_workers)
+        try:
+            raise SystemExit(run_bulk(args, session))
+        finally:
+            session.close()
+    if args.segments:
+        session = EncoderSession(args.decode_workers)
+        try:
+            print(json.dumps(run_segments(args, session), ensure_ascii=False))
+        finally:
+            session.close()
+        return
+    session = EncoderSession(args.decode_workers)
+    try:
+        if args.parity:
+            report = run_parity(args.manifest, args, session)
+            print(json.dumps(report))
+            raise SystemExit(0 if report["parity"]["collisions_match"] else 1)
+        print(json.dumps(run_audit(args.manifest, args, session)))
+    finally:
+        session.close()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,178 @@
+import os
+import json
+import sys
+import argparse
+import resource
+import subprocess
+import tempfile
+import time
+import wave
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import voice_forensic_audit as vfa
+
+DEFAULT_SIZES = [10, 100, 1000]
+SOURCE_RATE = 24000
+
+
+class SpectralStandIn:
+    # Offline stand-in with ECAPA's encode_batch interface: log band energies of the unpadded signal.
+    def __init__(self, dim=192, frame=512):
+        self.dim = dim
+        self.frame = frame
+
+    def encode_batch(self, wavs, wav_lens=None):
+        import torch
+        signals = wavs.numpy()
+        width = signals.shape[1]
+        lengths = np.full(len(signals), width) if wav_lens is None else np.round(wav_lens.numpy() * width).astype(int)
+        edges = np.linspace(0, self.frame // 2 + 1, self.dim + 1).astype(int)
+        out = np.zeros((len(signals), 1, self.dim), dtype=np.float32)
+        for row, (signal, length) in enumerate(zip(signals, lengths)):
+            usable = max(length // self.frame, 1) * self.frame
+            frames = np.resize(signal[:length], usable).reshape(-1, self.frame)
+            power = (np.abs(np.fft.rfft(frames * np.hanning(self.frame), axis=1)) ** 2).mean(axis=0)
+            bands = np.add.reduceat(power, edges[:-1])
+            out[row, 0] = np.log(bands + 1e-8) - np.log(bands + 1e-8).mean()
+        return torch.from_numpy(out)
+
+
+def write_wav(path, signal, rate):
+    pcm = (np.clip(signal, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(pcm.tobytes())
+
+
+def speaker_envelope(freqs, speaker):
+    # Formant-like spectral shaping up to the audit's Nyquist: speaker s gets exp(1.5 * cos((s + 1) * pi * f / Nyquist)).
+    # The cosines are orthogonal over linear frequency, so with the spectral stand-in every pair of speakers stays well
+    # under the 0.85 collision threshold (max ~0.53 up to 16 speakers): detected_collisions is 0 unless voices collide.
+    nyquist = vfa.SAMPLE_RATE / 2
+    return np.exp(1.5 * np.cos(np.pi * (speaker + 1) * np.minimum(freqs, nyquist) / nyquist))
+
+
+def build_corpus(root, chunk_count, speaker_count, seed):
+    # Each speaker gets its own fundamental and spectral envelope (harmonics and breath noise alike).
+    rng = np.random.default_rng(seed)
+    profiles = [{"f0": 90.0 + 35.0 * s} for s in range(speaker_count)]
+    out_dir = os.path.join(root, f"corpus_{chunk_count}")
+    os.makedirs(out_dir, exist_ok=True)
+    chunks = []
+    for i in range(chunk_count):
+        speaker = i % speaker_count
+        profile = profiles[speaker]
+        duration = rng.uniform(0.5, 4.0)
+        t = np.arange(int(duration * SOURCE_RATE)) / SOURCE_RATE
+        # 1% vibrato at 5 Hz as a phase warp; scaling t itself would sweep harmonics further the longer the chunk runs.
+        warped = t + 0.01 * np.sin(2 * np.pi * 5.0 * t) / (2 * np.pi * 5.0)
+        # Every harmonic below the audit's Nyquist, built by stepping exp(i*phase) up one harmonic at a time
+        # (one complex multiply each instead of a sin per harmonic).
+        fundamental = np.exp(2j * np.pi * profile["f0"] * warped)
+        harmonic = fundamental.copy()
+        voiced = np.zeros(len(t), dtype=np.complex128)
+        for h in range(1, int(0.95 * vfa.SAMPLE_RATE / 2 // profile["f0"]) + 1):
+            voiced += speaker_envelope(profile["f0"] * h, speaker) * harmonic
+            harmonic *= fundamental
+        signal = voiced.imag
+        noise = np.fft.irfft(np.fft.rfft(rng.standard_normal(len(t))) * speaker_envelope(np.fft.rfftfreq(len(t), 1 / SOURCE_RATE), speaker), len(t))
+        signal = signal / np.max(np.abs(signal)) + 0.3 * noise / np.max(np.abs(noise))
+        signal = 0.3 * signal / np.max(np.abs(signal))
+        filename = f"{i:05d}.wav"
+        write_wav(os.path.join(out_dir, filename), signal, SOURCE_RATE)
+        chunks.append({"index": i, "script_speaker": f"speaker_{speaker}", "filename": filename})
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    with open(manifest_path, "w") as f:
+        json.dump({"total_chunks": chunk_count, "chunks": chunks}, f)
+    return manifest_path
+
+
+def run_one(manifest_path, encoder, audit_argv):
+    args = vfa.parse_args([manifest_path, *audit_argv])
+    loader = vfa.load_classifier if encoder == "ecapa" else SpectralStandIn
+    session = vfa.EncoderSession(args.decode_workers, loader=loader)
+    try:
+        report = vfa.run_audit(manifest_path, args, session)
+    finally:
+        session.close()
+    chunks = sum(d["chunks"] for d in report["dispersion"].values())
+    total = report["timings"]["total"]
+    # ru_maxrss is KiB on Linux; children covers the decode pool.
+    return {
+        "chunks": chunks,
+        "chunks_per_sec": round(chunks / total, 2) if total else None,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_children_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        "model_load_sec": report["timings"]["model_load"],
+        "timings": report["timings"],
+        "batching": report["batching"],
+        "pipeline": report["pipeline"],
+        "detected_collisions": report["summary"]["detected_collisions"],
+    }
+
+
+def regressions(results, baseline_path, tolerance):
+    with open(baseline_path, "r") as f:
+        baseline = {row["chunks"]: row for row in json.load(f)["results"]}
+    found = []
+    for row in results:
+        before = baseline.get(row["chunks"])
+        if before and before["chunks_per_sec"] and row["chunks_per_sec"] < before["chunks_per_sec"] * (1 - tolerance):
+            found.append({"chunks": row["chunks"], "before": before["chunks_per_sec"], "after": row["chunks_per_sec"]})
+    return found
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Synthetic throughput benchmark for voice_forensic_audit.py")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--speakers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--encoder", choices=["standin", "ecapa"], default="standin")
+    parser.add_argument("--workdir", help="keep the generated corpus here instead of a temp dir")
+    parser.add_argument("--compare", metavar="BASELINE_JSON", help="fail if chunks/sec drops below a previous run")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--run-one", metavar="MANIFEST", help=argparse.SUPPRESS)
+    args, audit_argv = parser.parse_known_args(argv)
+    # Anything else (e.g. --batch-size 16 --decode-workers 0) is passed through to the audit.
+    args.audit_argv = [arg for arg in audit_argv if arg != "--"]
+    return args
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    if args.run_one:
+        print(json.dumps(run_one(args.run_one, args.encoder, args.audit_argv)))
+        return 0
+
+    audit_argv = ["--no-cache", *args.audit_argv]
+    results = []
+    with tempfile.TemporaryDirectory(prefix="yt3_voice_bench_") as tmp:
+        root = args.workdir or tmp
+        for size in args.sizes:
+            manifest_path = build_corpus(root, size, args.speakers, args.seed)
+            # One interpreter per size so peak RSS is not inherited from the previous size.
+            t0 = time.perf_counter()
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--run-one", manifest_path, "--encoder", args.encoder, "--", *audit_argv],
+                check=True,
+                text=True,
+                capture_output=True,
+            ).stdout
+            row = json.loads(output.strip().splitlines()[-1])
+            row["process_wall_sec"] = round(time.perf_counter() - t0, 4)
+            results.append(row)
+
+    report = {"encoder": args.encoder, "speakers": args.speakers, "audit_args": audit_argv, "results": results}
+    status = 0
+    if args.compare:
+        report["regressions"] = regressions(results, args.compare, args.tolerance)
+        status = 1 if report["regressions"] else 0
+    print(json.dumps(report, indent=2))
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
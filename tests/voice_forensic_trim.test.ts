@@ -0,0 +1,54 @@
+import { describe, expect, test } from "bun:test";
+import { spawnSync } from "node:child_process";
+import fs from "node:fs";
+import path from "node:path";
+
+const ROOT = path.join(__dirname, "..");
+// Same interpreter the audit agent runs voice_forensic_audit.py with.
+const PYTHON = path.join(ROOT, ".venv", "bin", "python");
+
+function runTrim(seconds: number, quietSeconds: number): {
+	samples: number;
+	frames: number;
+	mask: number;
+	trimmed: number;
+} {
+	const script = `
+import json, sys
+import numpy as np
+sys.path.insert(0, "src/scripts")
+import voice_forensic_audit as vfa
+seconds, quiet = float(sys.argv[1]), float(sys.argv[2])
+signal = (0.3 * np.random.default_rng(0).standard_normal(int(seconds * vfa.SAMPLE_RATE))).astype(np.float32)
+signal[: int(quiet * vfa.SAMPLE_RATE)] = 0
+mask, frame = vfa.voiced_mask(signal, -30.0)
+trimmed = vfa.trim_for_embedding(signal, -30.0)
+print(json.dumps({"samples": len(signal), "frames": len(signal) // frame, "mask": len(mask), "trimmed": len(trimmed)}))
+`;
+	const result = spawnSync(
+		PYTHON,
+		["-c", script, String(seconds), String(quietSeconds)],
+		{ cwd: ROOT, encoding: "utf-8" },
+	);
+	if (result.status !== 0) {
+		throw new Error(result.stderr);
+	}
+	return JSON.parse(result.stdout);
+}
+
+describe.skipIf(!fs.existsSync(PYTHON))("voice forensic VAD trim", () => {
+	test("keeps one mask entry per frame for chunks shorter than the hangover", () => {
+		for (const seconds of [0.05, 0.2, 0.32]) {
+			const report = runTrim(seconds, 0.03);
+			expect(report.mask).toBe(report.frames);
+			expect(report.trimmed).toBeLessThanOrEqual(report.samples);
+			expect(report.trimmed).toBeGreaterThan(0);
+		}
+	});
+
+	test("still cuts leading silence longer than the hangover", () => {
+		const report = runTrim(2.0, 1.0);
+		expect(report.mask).toBe(report.frames);
+		expect(report.trimmed).toBeLessThan(report.samples);
+	});
+});